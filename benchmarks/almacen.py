@@ -0,0 +1,69 @@
+"""
+Tiempo de guardar un año de incidentes en el almacén SQLite y de sacar de él los incidentes y las
+hojas de un reporte para distintos rangos de fechas, comparado con filtrar el DataFrame completo:
+
+    python benchmarks/almacen.py --eventos 3000000 --dias 365
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import pandas as pd  # noqa: E402
+
+from eventos_orion.almacen import abrir_almacen, guardar_incidentes  # noqa: E402
+from eventos_orion.pipeline import Pipeline  # noqa: E402
+from eventos_orion.sintetico import generar_export_realista  # noqa: E402
+from eventos_orion.turnos import TURNOS, asignar_turnos, fechas_rango, rango_turnos  # noqa: E402
+
+RANGOS_DIAS = [1, 7, 31, 92]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--eventos', type=int, default=3_000_000)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--variante', default='main', choices=['main', 'app'])
+    args = parser.parse_args()
+
+    pipeline = Pipeline(args.variante)
+    with tempfile.TemporaryDirectory() as temporal:
+        ruta_eventos = os.path.join(temporal, 'eventos.parquet')
+        generar_export_realista(args.eventos, max(args.eventos // 1500, 50), dias=args.dias).to_parquet(ruta_eventos, index=False)
+        incidentes = pipeline.procesar_archivo(ruta_eventos)
+
+        ruta_almacen = os.path.join(temporal, 'incidentes.sqlite')
+        inicio = time.perf_counter()
+        conexion = abrir_almacen(ruta_almacen)
+        guardar_incidentes(conexion, incidentes)
+        conexion.close()
+        print(f"incidentes={len(incidentes)} guardar={time.perf_counter() - inicio:.2f} s "
+              f"tamano={os.path.getsize(ruta_almacen) / 2 ** 20:.0f} MB")
+
+        primer_dia = incidentes['Fecha Down'].min().normalize() + pd.Timedelta(days=args.dias // 2)
+        for dias in RANGOS_DIAS:
+            fecha_inicio, fecha_fin = primer_dia, primer_dia + pd.Timedelta(days=dias - 1)
+            fechas = fechas_rango(fecha_inicio, fecha_fin)
+
+            inicio = time.perf_counter()
+            consultados = pipeline.consultar(fecha_inicio, fecha_fin, ruta_almacen)
+            etiquetas = asignar_turnos(consultados, TURNOS, fechas, incluir_up=True)
+            almacen = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            desde, hasta = rango_turnos(fecha_inicio, fecha_fin)
+            dentro = ((incidentes['Fecha Down'] >= desde) & (incidentes['Fecha Down'] < hasta)) | (
+                (incidentes['Fecha Up'] >= desde) & (incidentes['Fecha Up'] < hasta))
+            asignar_turnos(incidentes[dentro], TURNOS, fechas, incluir_up=True)
+            completo = time.perf_counter() - inicio
+
+            print(f"dias={dias} filas={len(consultados)} hojas={etiquetas.groupby(['Fecha', 'Turno']).ngroups} "
+                  f"almacen={almacen:.3f} s dataframe_completo={completo:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
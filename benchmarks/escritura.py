@@ -0,0 +1,80 @@
+"""
+Tiempo y pico de memoria (RSS) al escribir la hoja 'Incidentes Total' con pandas (to_excel) y con
+salida.EscritorReporte, sobre incidentes sintéticos. Cada medición corre en un proceso aparte:
+
+    python benchmarks/escritura.py --filas 10000 100000 1000000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Incidentes reales del pipeline a partir de eventos sintéticos (unos 4,5 eventos por incidente)
+GENERACION = r"""
+import sys
+sys.path.insert(0, sys.argv[1])
+from eventos_orion.pipeline import Pipeline, ajustar_horas
+from eventos_orion.sintetico import generar_export
+filas = int(sys.argv[3])
+pipeline = Pipeline('main')
+eventos = pipeline.clasificar(ajustar_horas(generar_export(filas * 5, max(filas // 200, 50), dias=90)))
+incidentes = pipeline.corregir(pipeline.emparejar(eventos))
+incidentes.head(filas).to_parquet(sys.argv[2], index=False)
+"""
+
+MEDICION = r"""
+import os, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+import pandas as pd
+from eventos_orion.salida import EscritorReporte
+
+df = pd.read_parquet(sys.argv[2])
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+ruta = os.path.join(os.path.dirname(sys.argv[2]), sys.argv[3] + '.xlsx')
+inicio = time.perf_counter()
+if sys.argv[3] == 'pandas':
+    with pd.ExcelWriter(ruta, engine='xlsxwriter') as escritor:
+        df.to_excel(escritor, sheet_name='Incidentes Total', index=False)
+elif sys.argv[3] == 'reporte':
+    with EscritorReporte(ruta) as escritor:
+        escritor.hoja('Incidentes Total', df)
+else:
+    with EscritorReporte(ruta, formatos=(sys.argv[3],)) as escritor:
+        escritor.hoja('Incidentes Total', df)
+segundos = time.perf_counter() - inicio
+pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print((pico - base) // 1024, round(segundos, 2), len(df))
+"""
+
+MODOS = ['pandas', 'reporte', 'csv', 'parquet']
+
+
+def medir(ruta_incidentes, modo):
+    salida = subprocess.run(
+        [sys.executable, '-c', MEDICION, RAIZ, ruta_incidentes, modo],
+        check=True, capture_output=True, text=True, cwd=RAIZ,
+    )
+    extra_mb, segundos, filas = salida.stdout.split()[-3:]
+    return int(extra_mb), float(segundos), int(filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--modos', nargs='+', default=MODOS, choices=MODOS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        for filas in args.filas:
+            ruta = os.path.join(temporal, f'incidentes_{filas}.parquet')
+            subprocess.run([sys.executable, '-c', GENERACION, RAIZ, ruta, str(filas)], check=True, cwd=RAIZ)
+            for modo in args.modos:
+                extra_mb, segundos, escritas = medir(ruta, modo)
+                print(f"filas={escritas} modo={modo} memoria_extra={extra_mb} MB tiempo={segundos} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Pico de memoria (RSS) del pipeline cargar → preprocesar → analizar → corregir sobre eventos sintéticos.
+
+Cada medición corre en un proceso aparte para que el pico sea solo de esa ejecución. Con --repo se
+mide otra copia del proyecto con el paquete eventos_orion (por ejemplo un checkout de una versión
+anterior) con los mismos datos; con --original, una copia anterior al paquete, llamando a
+preprocesar_datos, analizar_eventos y corregir_estados_reboot de su main.py o app.py:
+
+    python benchmarks/memoria.py --eventos 200000
+    python benchmarks/memoria.py --eventos 200000 --repo /tmp/eventos_orion_anterior
+    git worktree add /tmp/orion_original 421f2bc
+    python benchmarks/memoria.py --eventos 200000 --repo /tmp/orion_original --original
+
+Con --bloques se mide el modo por bloques (eventos_orion/streaming.py) leyendo de a ese número de filas.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# La generación también va en otro proceso: en Linux ru_maxrss se hereda del padre a través de exec
+GENERACION = r"""
+import sys
+sys.path.insert(0, sys.argv[1])
+from eventos_orion.sintetico import generar_export
+generar_export(int(sys.argv[3]), int(sys.argv[4])).to_parquet(sys.argv[2], index=False)
+"""
+
+MEDICION = r"""
+import resource, sys, time
+sys.path.insert(0, sys.argv[1])
+from eventos_orion.pipeline import Pipeline
+
+pipeline = Pipeline({variante!r})
+inicio = time.perf_counter()
+incidentes = pipeline.corregir(pipeline.emparejar(pipeline.clasificar(pipeline.cargar(sys.argv[2]))))
+segundos = time.perf_counter() - inicio
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024, round(segundos, 2), len(incidentes))
+"""
+
+# Versiones anteriores al paquete: las etapas son funciones de main.py o app.py
+MEDICION_ORIGINAL = r"""
+import resource, sys, time
+sys.path.insert(0, sys.argv[1])
+import pandas as pd
+import {variante} as modulo
+
+inicio = time.perf_counter()
+try:
+    import ingesta  # las versiones con ingesta.py leen el Parquet con su propio cargar_datos
+    df = modulo.cargar_datos(sys.argv[2])
+except ImportError:
+    # La versión inicial solo lee el Excel: se repite su ajuste de hora sobre el Parquet
+    df = pd.read_parquet(sys.argv[2])
+    df["EventTime"] = (df["EventTime"] - pd.Timedelta(hours=5)).dt.floor('min')
+incidentes = modulo.corregir_estados_reboot(modulo.analizar_eventos(modulo.preprocesar_datos(df)))
+segundos = time.perf_counter() - inicio
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024, round(segundos, 2), len(incidentes))
+"""
+
+MEDICION_BLOQUES = r"""
+import os, resource, sys, tempfile, time
+sys.path.insert(0, sys.argv[1])
+from eventos_orion.pipeline import Pipeline
+
+pipeline = Pipeline({variante!r})
+inicio = time.perf_counter()
+with tempfile.TemporaryDirectory() as temporal:
+    incidentes = pipeline.procesar_por_bloques(sys.argv[2], os.path.join(temporal, 'incidentes.parquet'), int(sys.argv[3]))
+segundos = time.perf_counter() - inicio
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024, round(segundos, 2), incidentes)
+"""
+
+
+def medir(repo, ruta_eventos, variante, bloques=None, original=False):
+    codigo = MEDICION_ORIGINAL if original else MEDICION_BLOQUES if bloques else MEDICION
+    argumentos = [str(bloques)] if bloques else []
+    salida = subprocess.run(
+        [sys.executable, '-c', codigo.format(variante=variante), repo, ruta_eventos, *argumentos],
+        check=True, capture_output=True, text=True, cwd=repo,
+    )
+    pico_mb, segundos, incidentes = salida.stdout.split()[-3:]
+    return int(pico_mb), float(segundos), int(incidentes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--eventos', type=int, default=200000)
+    parser.add_argument('--agencias', type=int, default=1000)
+    parser.add_argument('--variante', default='main', choices=['main', 'app'])
+    parser.add_argument('--repo', default=RAIZ, help="Copia del proyecto a medir (por defecto esta)")
+    parser.add_argument('--bloques', type=int, help="Filas por bloque para medir el modo por bloques")
+    parser.add_argument('--original', action='store_true',
+                        help="Mide main.py/app.py de una copia anterior al paquete eventos_orion (con --repo)")
+    args = parser.parse_args()
+    if args.original and args.bloques:
+        parser.error("--original no tiene modo por bloques")
+
+    with tempfile.TemporaryDirectory() as temporal:
+        ruta = os.path.join(temporal, 'eventos.parquet')
+        subprocess.run([sys.executable, '-c', GENERACION, RAIZ, ruta, str(args.eventos), str(args.agencias)], check=True)
+        pico_mb, segundos, incidentes = medir(os.path.abspath(args.repo), ruta, args.variante, args.bloques, args.original)
+
+    print(f"eventos={args.eventos} incidentes={incidentes} pico_rss={pico_mb} MB tiempo={segundos} s")
+
+
+if __name__ == "__main__":
+    main()
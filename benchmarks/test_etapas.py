@@ -0,0 +1,100 @@
+"""
+Tiempo de cada etapa del pipeline sobre exports sintéticos realistas (sintetico.generar_export_realista)
+de 10.000, 100.000 y 1.000.000 eventos, con pytest-benchmark. Cada medición guarda en extra_info las
+filas y una huella del resultado, para saber si un cambio aceleró algo o cambió resultados:
+
+    python -m pytest benchmarks/test_etapas.py --benchmark-save=base
+    # ... cambios ...
+    python -m pytest benchmarks/test_etapas.py --benchmark-compare=0001_base --benchmark-compare-fail=mean:10%
+
+Para medir una etapa o un tamaño se usa su id, p. ej.
+"benchmarks/test_etapas.py::test_analizar_eventos[eventos=100000]". --benchmark-json guarda los
+resultados, huellas incluidas. Sin pytest-benchmark instalado el módulo se salta.
+"""
+import hashlib
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import pandas as pd  # noqa: E402
+
+from eventos_orion.pipeline import Pipeline  # noqa: E402
+from eventos_orion.sintetico import generar_export_realista  # noqa: E402
+from eventos_orion.turnos import TURNOS, asignar_turnos, fechas_rango  # noqa: E402
+
+TAMANOS = [10_000, 100_000, 1_000_000]
+VARIANTE = 'main'
+RONDAS = 3
+
+
+def huella(df):
+    """Hash del contenido (valores y orden de filas), independiente de los tipos categóricos."""
+    valores = df.astype({columna: object for columna in df.columns if isinstance(df[columna].dtype, pd.CategoricalDtype)})
+    return hashlib.sha256(pd.util.hash_pandas_object(valores, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def medir(benchmark, funcion, preparar):
+    """Mejor de RONDAS corridas de funcion(preparar()); preparar (p. ej. copiar la entrada) no se cronometra."""
+    resultado = benchmark.pedantic(funcion, setup=lambda: ((preparar(),), {}), rounds=RONDAS, iterations=1)
+    benchmark.extra_info.update({'filas': len(resultado), 'huella': huella(resultado)})
+    return resultado
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+    return Pipeline(VARIANTE)
+
+
+@pytest.fixture(scope='module', params=TAMANOS, ids=lambda n: f'eventos={n}')
+def export(request, tmp_path_factory):
+    ruta = tmp_path_factory.mktemp('etapas') / f'eventos_{request.param}.parquet'
+    generar_export_realista(request.param, max(request.param // 500, 50)).to_parquet(ruta, index=False)
+    return ruta
+
+
+# Entradas de cada etapa, calculadas una vez por tamaño
+@pytest.fixture(scope='module')
+def eventos(pipeline, export):
+    return pipeline.cargar(export)
+
+
+@pytest.fixture(scope='module')
+def limpios(pipeline, eventos):
+    return pipeline.clasificar(eventos.copy())
+
+
+@pytest.fixture(scope='module')
+def incidentes(pipeline, limpios):
+    return pipeline.emparejar(limpios.copy())
+
+
+@pytest.fixture(scope='module')
+def corregidos(pipeline, incidentes):
+    return pipeline.corregir(incidentes.copy())
+
+
+def test_cargar_datos(benchmark, pipeline, export):
+    medir(benchmark, pipeline.cargar, lambda: export)
+
+
+def test_preprocesar_datos(benchmark, pipeline, eventos):
+    medir(benchmark, pipeline.clasificar, eventos.copy)
+
+
+def test_analizar_eventos(benchmark, pipeline, limpios):
+    medir(benchmark, pipeline.emparejar, limpios.copy)
+
+
+def test_corregir_estados_reboot(benchmark, pipeline, incidentes):
+    medir(benchmark, pipeline.corregir, incidentes.copy)
+
+
+def test_asignar_turnos(benchmark, corregidos):
+    fechas = fechas_rango(corregidos['Fecha Down'].min(), corregidos['Fecha Down'].max())
+    medir(benchmark, lambda df: asignar_turnos(df, TURNOS, fechas, incluir_up=True), lambda: corregidos)
@@ -0,0 +1,51 @@
+"""
+Reportes de incidentes de enlaces a partir de los eventos de Orion.
+
+    from datetime import datetime
+
+    from eventos_orion import Pipeline
+
+    pipeline = Pipeline('main', workers=4)
+    incidentes = pipeline.procesar('files/Report_Testing_orion_ggcas.xlsx')
+    pipeline.reportar(incidentes, 'dia', datetime(2025, 6, 1), datetime(2025, 6, 30))
+
+Los módulos con pandas, numpy o xlsxwriter se importan recién al usar algo que los necesita, para
+que la CLI y el modo en vivo arranquen sin cargarlos.
+"""
+import importlib
+
+# Nombre público -> módulo del paquete que lo define
+_EXPORTADOS = {
+    'Pipeline': 'pipeline',
+    'cargar_datos': 'pipeline',
+    'preprocesar_datos': 'pipeline',
+    'analizar_eventos': 'pipeline',
+    'escribir_reporte': 'pipeline',
+    'consultar_reporte': 'pipeline',
+    'consultar_resumen': 'pipeline',
+    'analizar_incidentes': 'procesamiento',
+    'corregir_estados_reboot': 'procesamiento',
+    'agrupar_flapping': 'flapping',
+    'evaluar_reglas': 'reglas',
+    'reglas_analisis': 'reglas',
+    'reglas_correccion': 'reglas',
+    'EscritorReporte': 'salida',
+    'MaquinaIncidentes': 'vivo',
+    'TURNOS': 'turnos',
+    'VARIANTES': 'variantes',
+    'PROVEEDORES_VALIDOS': 'variantes',
+}
+
+__all__ = list(_EXPORTADOS)
+
+
+def __getattr__(nombre):
+    if nombre not in _EXPORTADOS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(f'.{_EXPORTADOS[nombre]}', __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,166 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from .perfil import medir_etapa
+from .procesamiento import COLUMNAS_INCIDENTES, TIPO_ESTADO, codificar
+
+# Los incidentes se guardan agrupados físicamente por Fecha Down (la clave primaria empieza por
+# ella), así que un rango de fechas se lee de corrido. Las fechas son segundos desde 1970 en hora
+# local, como en los reportes; el estado es la posición en TIPO_ESTADO y el enlace, su id en la
+# tabla enlaces: leer enteros es mucho más rápido que leer textos fila por fila.
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS enlaces (
+    id INTEGER PRIMARY KEY,
+    enlace TEXT NOT NULL UNIQUE,
+    agencia_base TEXT,
+    proveedor TEXT
+);
+CREATE TABLE IF NOT EXISTS incidentes (
+    fecha_down INTEGER NOT NULL,
+    enlace INTEGER NOT NULL REFERENCES enlaces (id),
+    -- Desempate entre incidentes del mismo enlace con la misma Fecha Down, en el orden del análisis
+    orden INTEGER NOT NULL,
+    fecha_up INTEGER,
+    tiempo INTEGER,
+    estado INTEGER NOT NULL,
+    -- Repetida de enlaces para poder indexar por agencia y fecha
+    agencia_base TEXT,
+    PRIMARY KEY (fecha_down, enlace, orden)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS incidentes_agencia_fecha_down ON incidentes (agencia_base, fecha_down);
+-- Los reportes de madrugada también toman los incidentes por su Fecha Up
+CREATE INDEX IF NOT EXISTS incidentes_fecha_up ON incidentes (fecha_up);
+"""
+GUARDAR_ENLACE = """
+INSERT INTO enlaces (enlace, agencia_base, proveedor) VALUES (?, ?, ?)
+ON CONFLICT (enlace) DO UPDATE SET agencia_base = excluded.agencia_base, proveedor = excluded.proveedor
+"""
+GUARDAR_INCIDENTE = """
+INSERT INTO incidentes (fecha_down, enlace, orden, fecha_up, tiempo, estado, agencia_base) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (fecha_down, enlace, orden) DO UPDATE SET
+    fecha_up = excluded.fecha_up, tiempo = excluded.tiempo, estado = excluded.estado, agencia_base = excluded.agencia_base
+"""
+# Caídas abiertas de un enlace desde su primera Fecha Down en el export que se guarda: el export
+# las vuelve a calcular (cerradas, juntas con otra caída o abiertas otra vez)
+BORRAR_ABIERTOS = """
+DELETE FROM incidentes WHERE agencia_base IS ? AND enlace = ? AND fecha_down >= ? AND fecha_up IS NULL
+"""
+# NaT en numpy es el menor int64: los NULL se leen con este valor para no pasar por objetos
+NULO = np.iinfo(np.int64).min
+
+
+def abrir_almacen(ruta):
+    """Abre (o crea) la base SQLite de incidentes con sus tablas e índices."""
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    conexion = sqlite3.connect(ruta)
+    conexion.execute('PRAGMA journal_mode = WAL')
+    conexion.execute('PRAGMA synchronous = NORMAL')
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+
+def _segundos(fechas):
+    valores = pd.to_datetime(fechas).to_numpy(dtype='datetime64[s]')
+    return [None if nulo else valor for valor, nulo in zip(valores.astype('int64').tolist(), np.isnat(valores))]
+
+
+def _texto(serie):
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+
+@medir_etapa()
+def guardar_incidentes(conexion, df):
+    """
+    Inserta o actualiza los incidentes de df (como los deja corregir_estados_reboot). Un incidente
+    se identifica por Fecha Down, Enlace y su posición entre los del mismo enlace y Fecha Down, así
+    que volver a guardar un export que se solapa actualiza los incidentes en lugar de duplicarlos
+    (p. ej. una caída que quedó abierta y ahora tiene su up). Antes se borran las caídas abiertas
+    de cada enlace desde su primera Fecha Down en df, que df reemplaza.
+
+    Un export que no se solapa no cierra las caídas que quedaron abiertas en el anterior: su up no
+    tiene down en el mismo export y el incidente sigue como 'Caído' hasta cargar un export que
+    cubra los dos. Devuelve las filas guardadas.
+    """
+    df = df[df['Fecha Down'].notna()]
+    orden = df.groupby(['Enlace', 'Fecha Down'], sort=False, observed=True).cumcount()
+    df = df.assign(Orden=orden.to_numpy()).sort_values('Fecha Down', kind='mergesort')
+
+    enlaces = df.drop_duplicates('Enlace', keep='last')
+    primeras = df.drop_duplicates('Enlace', keep='first')
+    with conexion:
+        conexion.executemany(GUARDAR_ENLACE, zip(_texto(enlaces['Enlace']), _texto(enlaces['Agencia_base']), _texto(enlaces['Proveedor'])))
+        ids = dict(conexion.execute('SELECT enlace, id FROM enlaces').fetchall())
+        conexion.executemany(BORRAR_ABIERTOS, zip(
+            _texto(primeras['Agencia_base']), [ids[enlace] for enlace in _texto(primeras['Enlace'])], _segundos(primeras['Fecha Down']),
+        ))
+        conexion.executemany(GUARDAR_INCIDENTE, zip(
+            _segundos(df['Fecha Down']), [ids[enlace] for enlace in _texto(df['Enlace'])], df['Orden'].tolist(),
+            _segundos(df['Fecha Up']), df['Tiempo'].astype('Int64').to_numpy(dtype=object, na_value=None).tolist(),
+            pd.Categorical(df['Estado'].astype(object), dtype=TIPO_ESTADO).codes.tolist(), _texto(df['Agencia_base']),
+        ))
+    return len(df)
+
+
+@medir_etapa()
+def consultar_incidentes(conexion, desde, hasta, agencias=None, incluir_up=False):
+    """
+    Incidentes con Fecha Down (o, con incluir_up, Fecha Up) en [desde, hasta), opcionalmente solo
+    de las agencias indicadas, con las columnas y el orden de corregir_estados_reboot. Cada
+    condición es un rango sobre un índice, así que el costo depende de las filas devueltas y no
+    del tamaño de la historia.
+    """
+    limites = [int(pd.Timestamp(desde).timestamp()), int(pd.Timestamp(hasta).timestamp())]
+    filtro, parametros_filtro = '', []
+    if agencias is not None:
+        agencias = list(agencias)
+        filtro = f" AND agencia_base IN ({', '.join('?' * len(agencias))})"
+        parametros_filtro = agencias
+
+    columnas = f"fecha_down, enlace, orden, IFNULL(fecha_up, {NULO}), IFNULL(tiempo, {NULO}), estado FROM incidentes"
+    consulta = f"SELECT {columnas} WHERE fecha_down >= ? AND fecha_down < ?{filtro}"
+    parametros = limites + parametros_filtro
+    if incluir_up:
+        # Los que ya entraron por su Fecha Down no se repiten
+        consulta += f" UNION ALL SELECT {columnas} WHERE fecha_up >= ? AND fecha_up < ? AND fecha_down < ?{filtro}"
+        parametros += limites + limites[:1] + parametros_filtro
+    filas = np.array(conexion.execute(consulta, parametros).fetchall(), dtype=np.int64).reshape(-1, 6)
+    fecha_down, enlace, orden, fecha_up, tiempo, estado = filas.T
+
+    enlaces = conexion.execute('SELECT id, enlace, agencia_base, proveedor FROM enlaces ORDER BY id').fetchall()
+    ids, nombres, bases, proveedores = (list(columna) for columna in zip(*enlaces)) if enlaces else ([], [], [], [])
+    posicion = np.searchsorted(np.array(ids, dtype=np.int64), enlace)
+    nombres = pd.Series(nombres, dtype=object)
+    # Mismo orden que el análisis: por nombre de enlace, Fecha Down y orden de aparición
+    rango, _ = codificar(nombres)
+    orden_filas = np.lexsort((orden, fecha_down, rango[posicion]))
+    posicion = posicion[orden_filas]
+
+    def fechas(valores):
+        return valores[orden_filas].view('datetime64[s]').astype('datetime64[us]')
+
+    def categorias(valores):
+        codigos, unicos = pd.factorize(pd.Series(valores, dtype=object))
+        return pd.Categorical.from_codes(codigos[posicion], pd.Index(unicos).astype(object))
+
+    tiempo = tiempo[orden_filas]
+    sin_tiempo = tiempo == NULO
+    return pd.DataFrame({
+        'Enlace': categorias(nombres),
+        'Fecha Down': fechas(fecha_down),
+        'Fecha Up': fechas(fecha_up),
+        'Tiempo': pd.arrays.IntegerArray(np.where(sin_tiempo, 0, tiempo), sin_tiempo),
+        'Estado': pd.Categorical.from_codes(estado[orden_filas], dtype=TIPO_ESTADO),
+        'Agencia_base': categorias(bases),
+        'Proveedor': categorias(proveedores),
+    }, columns=COLUMNAS_INCIDENTES)
+
+
+def consultar_enlaces(conexion):
+    """Todos los enlaces guardados, con su Agencia_base y Proveedor."""
+    filas = conexion.execute('SELECT enlace, agencia_base, proveedor FROM enlaces ORDER BY id').fetchall()
+    return pd.DataFrame(filas, columns=['Enlace', 'Agencia_base', 'Proveedor'], dtype=object)
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+
+DIRECTORIO_CACHE = "files/.cache"
+# Subir cuando cambie la lógica del pipeline para que los resultados guardados dejen de usarse
+VERSION_CACHE = 3
+
+# Resultados procesados y hashes de contenido ya calculados en esta sesión
+_procesados = {}
+_hashes = {}
+
+
+def huella_archivo(ruta_archivo):
+    """Ruta, tamaño, mtime y hash SHA-256 del archivo de entrada."""
+    ruta = os.path.abspath(ruta_archivo)
+    stat = os.stat(ruta)
+    firma = (ruta, stat.st_size, stat.st_mtime_ns)
+    # Solo se vuelve a leer el contenido si cambió la ruta, el tamaño o el mtime
+    if firma not in _hashes:
+        sha = hashlib.sha256()
+        with open(ruta, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(1 << 20), b''):
+                sha.update(bloque)
+        _hashes[firma] = sha.hexdigest()
+    return {'ruta': ruta, 'tamano': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': _hashes[firma]}
+
+
+def clave_cache(ruta_archivo, parametros=None):
+    # Con varios exports la clave cubre la huella de cada uno, en orden
+    if isinstance(ruta_archivo, (list, tuple)):
+        archivo = [huella_archivo(ruta) for ruta in ruta_archivo]
+    else:
+        archivo = huella_archivo(ruta_archivo)
+    contenido = {
+        'version': VERSION_CACHE,
+        'archivo': archivo,
+        'parametros': parametros or {},
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _ruta_tipos(ruta):
+    return f"{os.path.splitext(ruta)[0]}.tipos.json"
+
+
+def _leer_disco(ruta):
+    """
+    Lee un resultado guardado con el tipo de las categorías de cada columna categórica como en el
+    procesamiento (Parquet las devuelve siempre como str). None si falta el archivo de tipos.
+    """
+    if not os.path.exists(_ruta_tipos(ruta)):
+        return None
+    try:
+        df = pd.read_parquet(ruta)
+    except ImportError:
+        return None
+    with open(_ruta_tipos(ruta), encoding='utf-8') as archivo:
+        tipos = json.load(archivo)
+    for columna, tipo in tipos.items():
+        valores = df[columna].cat
+        categorias = pd.CategoricalDtype(valores.categories.astype(tipo), ordered=valores.ordered)
+        df[columna] = pd.Categorical.from_codes(valores.codes, dtype=categorias)
+    return df
+
+
+def _escribir_disco(df, ruta):
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        df.to_parquet(ruta, index=False)
+    except ImportError:
+        # Sin pyarrow/fastparquet la caché queda solo en memoria
+        return
+    tipos = {
+        columna: str(df[columna].cat.categories.dtype)
+        for columna in df.columns if isinstance(df[columna].dtype, pd.CategoricalDtype)
+    }
+    with open(_ruta_tipos(ruta), 'w', encoding='utf-8') as archivo:
+        json.dump(tipos, archivo)
+
+
+def obtener_procesado(ruta_archivo, procesar, parametros=None, directorio=DIRECTORIO_CACHE):
+    """
+    Devuelve el resultado de procesar(ruta_archivo) usando la caché en memoria o en disco (Parquet).
+    La clave combina la huella del archivo (o de cada archivo de una lista) con los parámetros del
+    pipeline.
+    """
+    clave = clave_cache(ruta_archivo, parametros)
+
+    if clave not in _procesados:
+        ruta_cache = os.path.join(directorio, f"{clave}.parquet")
+        df = _leer_disco(ruta_cache) if os.path.exists(ruta_cache) else None
+        if df is None:
+            df = procesar(ruta_archivo)
+            _escribir_disco(df, ruta_cache)
+        _procesados[clave] = df
+
+    return _procesados[clave].copy()
+
+
+def invalidar_cache(directorio=DIRECTORIO_CACHE):
+    """Borra los resultados guardados en memoria y en disco."""
+    _procesados.clear()
+    _hashes.clear()
+    if os.path.isdir(directorio):
+        shutil.rmtree(directorio)
@@ -0,0 +1,288 @@
+import argparse
+import os
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .perfil import activar_desde_argumentos, agregar_argumentos
+from .variantes import (
+    ARCHIVO_ENTRADA, FLAPPING, FORMATO_EVENTTIME, FORMATOS_REPORTE, FORMATOS_SALIDA, NOMBRES_REPORTE, PROVEEDORES_VALIDOS, VARIANTES,
+    VENTANA_REBOOT,
+)
+
+# Códigos de salida para tareas programadas (cron)
+EXITO = 0
+ERROR_REPORTE = 1
+ERROR_ARGUMENTOS = 2
+ERROR_ENTRADA = 3
+
+TIPOS_REPORTE = list(NOMBRES_REPORTE)
+
+
+def leer_fecha(texto):
+    """Acepta dd/mm/yyyy (como el menú) o yyyy-mm-dd."""
+    for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"fecha inválida: {texto!r} (use dd/mm/yyyy o yyyy-mm-dd)")
+
+
+def leer_tipos(texto):
+    tipos = [tipo.strip() for tipo in texto.split(',') if tipo.strip()]
+    desconocidos = sorted(set(tipos) - set(TIPOS_REPORTE))
+    if not tipos or desconocidos:
+        raise argparse.ArgumentTypeError(f"tipos inválidos: {', '.join(desconocidos) or texto!r} (use {','.join(TIPOS_REPORTE)})")
+    return list(dict.fromkeys(tipos))
+
+
+def leer_formatos(texto):
+    formatos = [formato.strip().lower() for formato in texto.split(',') if formato.strip()]
+    desconocidos = sorted(set(formatos) - set(FORMATOS_SALIDA))
+    if not formatos or desconocidos:
+        raise argparse.ArgumentTypeError(f"formatos inválidos: {', '.join(desconocidos) or texto!r} (use {','.join(FORMATOS_SALIDA)})")
+    return tuple(dict.fromkeys(formatos))
+
+
+def leer_flapping(texto):
+    """'ventana,caidas' (p. ej. 30min,5) o 'no' para dejar las caídas sueltas."""
+    if texto.strip().lower() == 'no':
+        return None
+    try:
+        ventana, caidas = texto.split(',')
+        return {'ventana': ventana.strip(), 'caidas': int(caidas)}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"flapping inválido: {texto!r} (use ventana,caidas como 30min,5, o no)") from None
+
+
+def ruta_reporte(directorio, tipo, fecha_inicio, fecha_fin):
+    return os.path.join(directorio, f"{fecha_inicio.strftime('%Y%m%d')}_{fecha_fin.strftime('%Y%m%d')}_{NOMBRES_REPORTE[tipo]}.xlsx")
+
+
+def rutas_generadas(ruta, formatos):
+    """El Excel de ruta si se pidió y la carpeta con las hojas en CSV o Parquet (ver salida.EscritorReporte)."""
+    return ([ruta] if 'xlsx' in formatos else []) + ([os.path.splitext(ruta)[0]] if set(formatos) - {'xlsx'} else [])
+
+
+def entrada_inexistente(entradas):
+    """Mensaje de error si algún export (ruta o patrón glob) no existe; None si están todos."""
+    from .ingesta import expandir_rutas
+
+    try:
+        rutas = expandir_rutas(entradas)
+    except FileNotFoundError as error:
+        return str(error)
+    faltantes = [ruta for ruta in rutas if not os.path.exists(ruta)]
+    return f"No existe el archivo de entrada: {', '.join(faltantes)}" if faltantes else None
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog='eventos-orion', description="Reportes de incidentes de enlaces a partir del export de Orion.")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    reporte = subcomandos.add_parser('report', help="Procesa el export una vez y genera los reportes pedidos")
+    reporte.add_argument('--from', dest='desde', type=leer_fecha, required=True, help="Fecha de inicio (dd/mm/yyyy)")
+    reporte.add_argument('--to', dest='hasta', type=leer_fecha, required=True, help="Fecha de fin (dd/mm/yyyy)")
+    reporte.add_argument('--types', dest='tipos', type=leer_tipos, default=None,
+                         help=f"Reportes separados por coma: {','.join(TIPOS_REPORTE)} (por defecto todos los de la variante)")
+    reporte.add_argument('--input', dest='entrada', nargs='+',
+                         help="Exports de Orion, rutas o patrones glob entre comillas (por defecto el de la variante)")
+    reporte.add_argument('--output-dir', dest='directorio', default='files', help="Carpeta de los reportes")
+    reporte.add_argument('--variante', choices=list(VARIANTES), default='main',
+                         help="Reglas de main (caídas repetidas ignoradas) o de app")
+    reporte.add_argument('--workers', type=int, default=1, help="Procesos para analizar las agencias en paralelo")
+    reporte.add_argument('--formatos', type=leer_formatos, default=None,
+                         help=f"Formatos de salida separados por coma: {', '.join(FORMATOS_SALIDA)}")
+    reporte.add_argument('--flapping', type=leer_flapping, default=FLAPPING, metavar='VENTANA,CAIDAS',
+                         help="Junta en un incidente 'Flapping' las ráfagas de CAIDAS caídas de un enlace dentro de VENTANA "
+                              "(por defecto FLAPPING de variantes.py; 'no' para dejarlas sueltas)")
+    reporte.add_argument('--store', dest='almacen', nargs='?', const='', default=None, metavar='RUTA',
+                         help="Consulta los incidentes en el almacén (por defecto el de la variante) en lugar de procesar el export")
+    agregar_argumentos(reporte)
+
+    carga = subcomandos.add_parser('load', help="Procesa el export y guarda sus incidentes en el almacén")
+    carga.add_argument('--input', dest='entrada', nargs='+',
+                       help="Exports de Orion, rutas o patrones glob entre comillas (por defecto el de la variante)")
+    carga.add_argument('--store', dest='almacen', default='', metavar='RUTA', help="Base SQLite (por defecto la de la variante)")
+    carga.add_argument('--variante', choices=list(VARIANTES), default='main',
+                       help="Reglas de main (caídas repetidas ignoradas) o de app")
+    carga.add_argument('--workers', type=int, default=1, help="Procesos para analizar las agencias en paralelo")
+    agregar_argumentos(carga)
+
+    resumen = subcomandos.add_parser('summary', help="Escribe el resumen por proveedor y agencia guardado por los lotes incrementales")
+    resumen.add_argument('--from', dest='desde', type=leer_fecha, required=True, help="Fecha de inicio (dd/mm/yyyy)")
+    resumen.add_argument('--to', dest='hasta', type=leer_fecha, required=True, help="Fecha de fin (dd/mm/yyyy)")
+    resumen.add_argument('--summary-dir', dest='directorio_resumen', default=None, help="Agregados guardados (por defecto los incrementales)")
+    resumen.add_argument('--output-dir', dest='directorio', default='files', help="Carpeta del resumen")
+    resumen.add_argument('--formatos', type=leer_formatos, default=('xlsx',),
+                         help=f"Formatos de salida separados por coma: {', '.join(FORMATOS_SALIDA)}")
+
+    vivo = subcomandos.add_parser('live', help="Sigue los eventos de Orion en vivo y emite cada incidente al cerrarse")
+    fuente = vivo.add_mutually_exclusive_group(required=True)
+    fuente.add_argument('--file', dest='archivo', help="Archivo JSON por líneas (o .csv con encabezado) que se va escribiendo")
+    fuente.add_argument('--socket', help="host:puerto o ruta de socket Unix donde recibir eventos JSON por líneas")
+    vivo.add_argument('--variante', choices=list(VARIANTES), default='main',
+                      help="Reglas de main (caídas repetidas ignoradas) o de app")
+    vivo.add_argument('--output', dest='salida', help="Archivo al que agregar los incidentes (por defecto la salida estándar)")
+    vivo.add_argument('--state', dest='estado', help="JSON con las caídas abiertas, actualizado periódicamente")
+    vivo.add_argument('--from-start', dest='desde_inicio', action='store_true',
+                      help="Lee el archivo desde el principio en lugar de solo las líneas nuevas")
+    vivo.add_argument('--until-eof', dest='hasta_fin', action='store_true',
+                      help="Lee el archivo completo, termina al final y emite las caídas abiertas como 'Caído', como el reporte")
+
+    subcomandos.add_parser('clear-cache', help="Borra los resultados de procesamiento guardados")
+    return parser
+
+
+def generar_reportes(args):
+    from .pipeline import Pipeline
+
+    pipeline = Pipeline(args.variante, args.workers, args.formatos or FORMATOS_REPORTE, flapping=args.flapping)
+    # Sin --types van todos los reportes de la variante; solo un tipo pedido que no tiene es un error
+    tipos = args.tipos or list(pipeline.reportes)
+    no_disponibles = [tipo for tipo in tipos if tipo not in pipeline.reportes]
+    if no_disponibles:
+        print(f"❌ Reportes no disponibles en la variante {args.variante}: {', '.join(no_disponibles)}", file=sys.stderr)
+        return ERROR_ARGUMENTOS
+    if args.hasta < args.desde:
+        print("❌ La fecha de fin es anterior a la de inicio", file=sys.stderr)
+        return ERROR_ARGUMENTOS
+    if args.almacen is not None:
+        entradas = [args.almacen or pipeline.config['archivo_almacen']]
+    else:
+        entradas = args.entrada or [ARCHIVO_ENTRADA]
+    error = entrada_inexistente(entradas)
+    if error:
+        print(f"❌ {error}", file=sys.stderr)
+        return ERROR_ENTRADA
+
+    # Se procesa (o se consulta en el almacén) una sola vez y los reportes se escriben a la vez, cada uno en su hilo
+    resumen = None
+    try:
+        if args.almacen is not None:
+            df_corregido = pipeline.consultar(args.desde, args.hasta, entradas[0])
+            # La consulta solo cubre los turnos: el resumen de los días completos se consulta aparte
+            resumen = pipeline.consultar_resumen(args.desde, args.hasta, entradas[0])
+        else:
+            df_corregido = pipeline.procesar(entradas)
+    except Exception:
+        traceback.print_exc()
+        print(f"❌ No se pudo procesar {', '.join(entradas)}", file=sys.stderr)
+        return ERROR_ENTRADA
+
+    os.makedirs(args.directorio, exist_ok=True)
+    rutas = {tipo: ruta_reporte(args.directorio, tipo, args.desde, args.hasta) for tipo in tipos}
+    codigo = EXITO
+    with ThreadPoolExecutor(max_workers=len(rutas)) as pool:
+        futuros = {
+            tipo: pool.submit(pipeline.reportar, df_corregido, tipo, args.desde, args.hasta, ruta, resumen)
+            for tipo, ruta in rutas.items()
+        }
+        for tipo, futuro in futuros.items():
+            try:
+                futuro.result()
+                for ruta in rutas_generadas(rutas[tipo], pipeline.formatos):
+                    print(f"✅ Archivo generado exitosamente: {ruta}")
+            except Exception:
+                traceback.print_exc()
+                print(f"❌ Falló el reporte {tipo}", file=sys.stderr)
+                codigo = ERROR_REPORTE
+    return codigo
+
+
+def cargar_almacen(args):
+    from .pipeline import Pipeline
+
+    pipeline = Pipeline(args.variante, args.workers)
+    ruta_almacen = args.almacen or pipeline.config['archivo_almacen']
+    entradas = args.entrada or [ARCHIVO_ENTRADA]
+    error = entrada_inexistente(entradas)
+    if error:
+        print(f"❌ {error}", file=sys.stderr)
+        return ERROR_ENTRADA
+    try:
+        total = pipeline.guardar_en_almacen(entradas, ruta_almacen)
+    except Exception:
+        traceback.print_exc()
+        print(f"❌ No se pudo procesar {', '.join(entradas)}", file=sys.stderr)
+        return ERROR_ENTRADA
+    print(f":::: Se han guardado {total} incidentes en {ruta_almacen} ::::")
+    return EXITO
+
+
+def escribir_resumen_guardado(args):
+    from .resumen import DIRECTORIO_RESUMEN, escribir_resumen, leer_resumen
+    from .salida import EscritorReporte
+
+    if args.hasta < args.desde:
+        print("❌ La fecha de fin es anterior a la de inicio", file=sys.stderr)
+        return ERROR_ARGUMENTOS
+    directorio_resumen = args.directorio_resumen or DIRECTORIO_RESUMEN
+    if not os.path.isdir(directorio_resumen):
+        print(f"❌ No existe el resumen: {directorio_resumen}", file=sys.stderr)
+        return ERROR_ENTRADA
+
+    os.makedirs(args.directorio, exist_ok=True)
+    ruta = os.path.join(args.directorio, f"{args.desde.strftime('%Y%m%d')}_{args.hasta.strftime('%Y%m%d')}_Resumen.xlsx")
+    try:
+        with EscritorReporte(ruta, args.formatos) as escritor:
+            escribir_resumen(escritor, leer_resumen(args.desde, args.hasta, directorio_resumen), args.desde, args.hasta)
+    except Exception:
+        traceback.print_exc()
+        print("❌ Falló el resumen", file=sys.stderr)
+        return ERROR_REPORTE
+    for ruta in rutas_generadas(ruta, args.formatos):
+        print(f"✅ Archivo generado exitosamente: {ruta}")
+    return EXITO
+
+
+def seguir_en_vivo(args):
+    import asyncio
+
+    from . import vivo
+
+    if args.archivo and not os.path.exists(args.archivo):
+        print(f"❌ No existe el archivo de entrada: {args.archivo}", file=sys.stderr)
+        return ERROR_ENTRADA
+    maquina = vivo.MaquinaIncidentes(PROVEEDORES_VALIDOS, VARIANTES[args.variante]['caidas_repetidas'], VENTANA_REBOOT)
+    if args.archivo:
+        fuente = vivo.seguir_archivo(args.archivo, args.desde_inicio or args.hasta_fin, args.hasta_fin)
+    else:
+        fuente = vivo.escuchar_socket(args.socket)
+
+    salida = open(args.salida, 'a', encoding='utf-8') if args.salida else sys.stdout
+    try:
+        medidas = asyncio.run(vivo.ejecutar(fuente, maquina, salida, args.estado, caidas_al_final=args.hasta_fin))
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    promedio = medidas['tiempo_s'] / max(medidas['eventos'], 1) * 1e6
+    print(f"eventos={medidas['eventos']} incidentes={medidas['incidentes']} "
+          f"latencia_media={promedio:.1f} µs latencia_maxima={medidas['maximo_s'] * 1e6:.1f} µs", file=sys.stderr)
+    if maquina.sin_fecha:
+        print(f"⚠️ {maquina.sin_fecha} eventos descartados: su EventTime no tiene el formato {FORMATO_EVENTTIME!r}", file=sys.stderr)
+    return EXITO
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if args.comando == 'clear-cache':
+        from .cache import invalidar_cache
+
+        invalidar_cache()
+        print(":::: Se ha limpiado la caché ::::")
+        return EXITO
+    if args.comando == 'summary':
+        return escribir_resumen_guardado(args)
+    if args.comando == 'live':
+        return seguir_en_vivo(args)
+    activar_desde_argumentos(args)
+    if args.comando == 'load':
+        return cargar_almacen(args)
+    return generar_reportes(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
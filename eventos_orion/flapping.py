@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from .mensajes import ESTADOS
+from .reglas import buscar_ventana, indexar_por_grupo
+
+ESTADO_FLAPPING = 'Flapping'
+# Caídas que junta cada fila del reporte; distinta de la columna 'Caídas' del resumen, que cuenta
+# los incidentes 'Caído y recuperado'
+COLUMNA_AGRUPADAS = 'Caídas agrupadas'
+# Solo aparece en las hojas de los reportes: el almacén y el resumen guardan los incidentes sueltos
+TIPO_ESTADO_REPORTE = pd.CategoricalDtype(ESTADOS + [ESTADO_FLAPPING])
+
+
+def rafagas_flapping(df, ventana='30min', caidas=5):
+    """
+    Número de ráfaga de cada incidente de df, o -1 si no está en ninguna. Un enlace está en
+    flapping cuando cae al menos caidas veces dentro de ventana: las caídas se ordenan una vez por
+    (Enlace, Fecha Down), cada una cuenta con searchsorted las de la ventana que termina en ella y
+    las caídas de las ventanas que llegan a caidas, unidas, forman las ráfagas.
+    """
+    ventana = pd.Timedelta(ventana).to_timedelta64()
+    mitad = ventana / 2
+    enlaces = np.asarray(df['Enlace'], dtype=object)
+    tiempos = df['Fecha Down'].to_numpy(dtype='datetime64[ns]')
+    n = len(tiempos)
+    if not n:
+        return np.zeros(0, dtype=np.int64)
+
+    # [ini, fin) del índice: las caídas del mismo enlace en [Fecha Down - ventana, Fecha Down]
+    indice = indexar_por_grupo(enlaces, tiempos)
+    ini, fin = buscar_ventana(indice, enlaces, tiempos - mitad, mitad)
+    llenas = fin - ini >= caidas
+
+    # Marca de una vez todos los rangos de las ventanas llenas con un array de diferencias
+    diferencias = np.bincount(ini[llenas], minlength=n + 1) - np.bincount(fin[llenas], minlength=n + 1)
+    marcado = np.cumsum(diferencias[:n]) > 0
+
+    # Una ráfaga se corta al cambiar de enlace o si entre dos caídas pasa más de ventana
+    tiempo = tiempos[indice['orden']]
+    enlace = indice['claves'] // (len(indice['instantes']) + 1)
+    nueva = marcado.copy()
+    nueva[1:] &= ~marcado[:-1] | (enlace[1:] != enlace[:-1]) | (tiempo[1:] - tiempo[:-1] > ventana)
+
+    rafaga = np.full(n, -1, dtype=np.int64)
+    rafaga[indice['orden']] = np.where(marcado, np.cumsum(nueva) - 1, -1)
+    return rafaga
+
+
+def agrupar_flapping(df, ventana='30min', caidas=5):
+    """
+    Junta las caídas de cada ráfaga de flapping (ver rafagas_flapping) en un incidente 'Flapping':
+    Fecha Down de la primera caída, Fecha Up de la última (vacía si sigue caída), Tiempo
+    con la suma de los minutos caídos y 'Caídas agrupadas' con cuántas junta; los demás incidentes
+    quedan igual, con 1. Cada ráfaga ocupa el lugar de su primera caída en el orden de df.
+    """
+    rafaga = rafagas_flapping(df, ventana, caidas)
+    en_rafaga = rafaga >= 0
+    sueltos = df[~en_rafaga].assign(**{COLUMNA_AGRUPADAS: 1})
+    sueltos['Estado'] = sueltos['Estado'].astype(object).astype(TIPO_ESTADO_REPORTE)
+    if not en_rafaga.any():
+        return sueltos.reset_index(drop=True)
+
+    miembros = df[en_rafaga].assign(Rafaga=rafaga[en_rafaga], Posicion=np.flatnonzero(en_rafaga))
+    grupos = miembros.groupby('Rafaga', sort=True)
+    agregados = {columna: (columna, 'first') for columna in df.columns}
+    agregados.update({
+        'Fecha Down': ('Fecha Down', 'min'), 'Fecha Up': ('Fecha Up', 'max'),
+        COLUMNA_AGRUPADAS: ('Fecha Down', 'size'), 'Posicion': ('Posicion', 'min'),
+    })
+    juntos = grupos.agg(**agregados)
+    # Sin ningún up en la ráfaga el Tiempo queda vacío, como el de un 'Caído'
+    juntos['Tiempo'] = grupos['Tiempo'].sum(min_count=1)
+    # El enlace sigue caído solo si la última caída de la ráfaga no tiene up
+    ultimas = miembros.sort_values(['Rafaga', 'Fecha Down'], kind='stable').drop_duplicates('Rafaga', keep='last')
+    juntos.loc[ultimas['Fecha Up'].isna().to_numpy(), 'Fecha Up'] = pd.NaT
+    juntos['Estado'] = pd.Categorical([ESTADO_FLAPPING] * len(juntos), dtype=TIPO_ESTADO_REPORTE)
+
+    posiciones = np.concatenate([np.flatnonzero(~en_rafaga), juntos.pop('Posicion').to_numpy()])
+    resultado = pd.concat([sueltos, juntos], ignore_index=True)
+    return resultado.iloc[np.argsort(posiciones, kind='stable')].reset_index(drop=True)
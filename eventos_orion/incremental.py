@@ -0,0 +1,253 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .perfil import medir_etapa
+from .procesamiento import (
+    COLUMNAS_INCIDENTES, analizar_incidentes, clasificar_eventos, compactar_incidentes, corregir_estados_reboot,
+)
+
+DIRECTORIO_INCREMENTAL = "files/incremental"
+COLUMNAS_EVENTOS = ['EventTime', 'EventTypeName', 'Message', 'Proveedor', 'Agencia_base']
+CLAVE_EVENTO = ['EventTime', 'EventTypeName', 'Message']
+ORDEN_INCIDENTES = ['Enlace', 'Fecha Down', 'Orden']
+
+
+def nuevo_estado(caidas_repetidas=False, ventana_reboot='2min', margen_reboot='2min'):
+    """
+    Estado entre lotes: la marca de tiempo del último evento, el ordinal del siguiente evento, los
+    eventos pendientes (caídas abiertas, incidentes cerca del final, reboots recientes y el borde) y
+    los incidentes recientes que todavía pueden cambiar o que sirven de contexto.
+    """
+    return {
+        'parametros': {'caidas_repetidas': caidas_repetidas, 'ventana_reboot': ventana_reboot, 'margen_reboot': margen_reboot},
+        'marca': None,
+        'siguiente_orden': 0,
+        # Lotes guardados hasta ahora: cada uno escribe sus archivos con su número
+        'lote': 0,
+        'archivos_incidentes': [],
+        'pendientes': None,
+        'recientes': None,
+    }
+
+
+def _descartar_repetidos(nuevos, pendientes, marca):
+    """
+    Quita los eventos ya procesados en lotes anteriores (exports que se solapan): los anteriores a la
+    marca y, en el minuto de la marca, los primeros del lote que repiten en orden el final de ese
+    minuto en el lote anterior. Un evento igual a otro ya visto pero que no forma parte de esa
+    repetición (p. ej. dos ups del mismo enlace en el mismo minuto) se conserva.
+    """
+    nuevos = nuevos[nuevos['EventTime'] >= marca]
+    borde = pendientes[pendientes['EventTime'] == marca]
+    en_marca = np.flatnonzero((nuevos['EventTime'] == marca).to_numpy())
+    if not len(borde) or not len(en_marca):
+        return nuevos
+    anteriores = pd.util.hash_pandas_object(borde[CLAVE_EVENTO].astype(object), index=False).to_numpy()
+    repetibles = pd.util.hash_pandas_object(nuevos.iloc[en_marca][CLAVE_EVENTO].astype(object), index=False).to_numpy()
+    for repetidos in range(min(len(anteriores), len(repetibles)), 0, -1):
+        if np.array_equal(anteriores[len(anteriores) - repetidos:], repetibles[:repetidos]):
+            conservar = np.ones(len(nuevos), dtype=bool)
+            conservar[en_marca[:repetidos]] = False
+            return nuevos[conservar]
+    return nuevos
+
+
+@medir_etapa()
+def avanzar(estado, df, descartar_repetidos=True):
+    """
+    Procesa un lote de eventos ya preprocesados sobre el estado y devuelve (estado, cerrados): los
+    incidentes cuyo resultado ya no puede cambiar con eventos posteriores. Emitiendo los cerrados de
+    cada lote y, al final, los de cerrar_estado se obtienen las mismas filas que procesando toda la
+    historia de una vez.
+
+    Solo se reprocesan los eventos nuevos más los pendientes: por agencia, los eventos desde la caída
+    que sigue abierta (o desde el primer incidente cuyo up cae cerca del final del lote), los reboots
+    recientes y los eventos del último minuto. Con descartar_repetidos los eventos anteriores a la
+    marca, o repetidos en ella, se consideran ya procesados.
+    """
+    parametros = estado['parametros']
+    ventana = pd.Timedelta(parametros['ventana_reboot'])
+    margen = pd.Timedelta(parametros['margen_reboot'])
+
+    nuevos = df[COLUMNAS_EVENTOS].copy()
+    nuevos['Orden'] = np.arange(len(nuevos), dtype='int64') + estado['siguiente_orden']
+    nuevos = nuevos[nuevos['EventTime'].notna()]
+    pendientes = estado['pendientes'] if estado['pendientes'] is not None else nuevos.iloc[:0]
+    marca_anterior = pd.Timestamp(estado['marca']) if estado['marca'] else None
+    if marca_anterior is not None and descartar_repetidos:
+        nuevos = _descartar_repetidos(nuevos, pendientes, marca_anterior)
+
+    combinado = pd.concat([pendientes, nuevos], ignore_index=True).sort_values('Orden', kind='mergesort')
+    combinado.reset_index(drop=True, inplace=True)
+    recalculados = analizar_incidentes(
+        combinado, parametros['caidas_repetidas'], parametros['ventana_reboot'], columna_origen='Orden',
+    )
+    recalculados['Estado_base'] = recalculados['Estado']
+    recalculados['Emitido'] = False
+
+    # Los incidentes que nacen de eventos pendientes se sustituyen por su versión recalculada
+    if estado['recientes'] is not None:
+        recientes = estado['recientes']
+        recientes = recientes[~recientes['Orden'].isin(pendientes['Orden'])]
+        incidentes = pd.concat([recientes, recalculados], ignore_index=True)
+    else:
+        incidentes = recalculados
+
+    # Solo cambia el estado final de lo que está a menos de margen de algo recalculado
+    fecha_up = incidentes['Fecha Up']
+    corte = marca_anterior - ventana - margen if marca_anterior is not None else fecha_up.min()
+    afectados = ~incidentes['Emitido'] & ((fecha_up >= corte) | fecha_up.isna())
+    contexto = afectados | (fecha_up >= corte - margen)
+    entrada = incidentes.loc[contexto, COLUMNAS_INCIDENTES].assign(Estado=incidentes.loc[contexto, 'Estado_base'])
+    indice_entrada = entrada.index
+    corregidos = corregir_estados_reboot(entrada, parametros['margen_reboot'])
+    corregidos.index = indice_entrada
+    columnas_corregidas = ['Estado', 'Agencia_base', 'Proveedor']
+    incidentes = incidentes.astype({columna: object for columna in columnas_corregidas})
+    incidentes.loc[afectados, columnas_corregidas] = corregidos.loc[afectados[contexto], columnas_corregidas]
+    incidentes = incidentes.sort_values(ORDEN_INCIDENTES, kind='mergesort', ignore_index=True)
+
+    # Eventos que el siguiente lote necesita: incidentes abiertos o cercanos al final, reboots recientes y el borde
+    marca = combinado['EventTime'].max() if len(combinado) else marca_anterior
+    if marca is None:
+        estado['siguiente_orden'] += len(df)
+        return estado, incidentes.iloc[:0]
+    abierto = (incidentes['Estado_base'] == 'Caído') & ~incidentes['Enlace'].duplicated(keep='last')
+    pendiente = abierto | (incidentes['Fecha Up'] >= marca - ventana)
+    inicio = incidentes[pendiente].groupby('Enlace', observed=True).first()
+    fecha_inicio = combinado['Agencia_base'].map(inicio['Fecha Down'])
+    orden_inicio = combinado['Agencia_base'].map(inicio['Orden'])
+    _, _, es_reboot = clasificar_eventos(combinado['EventTypeName'])
+    conservar = (
+        ((combinado['EventTime'] > fecha_inicio)
+         | ((combinado['EventTime'] == fecha_inicio) & (combinado['Orden'] >= orden_inicio))).to_numpy()
+        | (es_reboot & (combinado['EventTime'] >= marca - 2 * ventana).to_numpy())
+        | (combinado['EventTime'] == marca).to_numpy()
+    )
+    pendientes = combinado[conservar]
+
+    # Cerrado: no se recalcula en el siguiente lote y queda fuera de la zona que aún puede corregirse
+    corte_siguiente = marca - ventana - margen
+    recalculable = incidentes['Orden'].isin(pendientes['Orden'])
+    fecha_up = incidentes['Fecha Up']
+    cerrado = ~incidentes['Emitido'] & ~recalculable & ((fecha_up < corte_siguiente) | fecha_up.isna())
+    cerrados = incidentes[cerrado].copy()
+    incidentes.loc[cerrado, 'Emitido'] = True
+
+    estado['marca'] = marca.isoformat()
+    estado['siguiente_orden'] += len(df)
+    estado['pendientes'] = pendientes
+    estado['recientes'] = incidentes[recalculable | (fecha_up >= corte_siguiente - margen)].reset_index(drop=True)
+    return estado, cerrados
+
+
+def cerrar_estado(estado):
+    """Incidentes aún no emitidos al terminar la entrada (incluye las caídas que siguen abiertas)."""
+    if estado['recientes'] is None:
+        return None
+    recientes = estado['recientes']
+    return recientes[~recientes['Emitido']].copy()
+
+
+def tabla_incidentes(partes):
+    """Une partes emitidas en el mismo orden y con los mismos tipos que el procesamiento completo."""
+    partes = [parte for parte in partes if parte is not None and len(parte)]
+    if not partes:
+        return compactar_incidentes(pd.DataFrame(columns=COLUMNAS_INCIDENTES))
+    incidentes = pd.concat(partes, ignore_index=True)
+    incidentes = incidentes.astype({'Enlace': object}).sort_values(ORDEN_INCIDENTES, kind='mergesort', ignore_index=True)
+    return compactar_incidentes(incidentes[COLUMNAS_INCIDENTES].copy())
+
+
+# ---------------------- Persistencia ----------------------
+
+def _rutas(directorio, lote):
+    return (
+        os.path.join(directorio, 'estado.json'),
+        os.path.join(directorio, f'eventos_pendientes_{lote:06d}.parquet'),
+        os.path.join(directorio, f'incidentes_recientes_{lote:06d}.parquet'),
+        os.path.join(directorio, 'incidentes'),
+    )
+
+
+def cargar_estado(directorio=DIRECTORIO_INCREMENTAL):
+    """Estado guardado por el último lote, o None si no hay."""
+    ruta_estado = _rutas(directorio, 0)[0]
+    if not os.path.exists(ruta_estado):
+        return None
+    with open(ruta_estado, encoding='utf-8') as archivo:
+        estado = json.load(archivo)
+    _, ruta_pendientes, ruta_recientes, _ = _rutas(directorio, estado['lote'])
+    estado['pendientes'] = pd.read_parquet(ruta_pendientes) if os.path.exists(ruta_pendientes) else None
+    estado['recientes'] = pd.read_parquet(ruta_recientes) if os.path.exists(ruta_recientes) else None
+    return estado
+
+
+def guardar_estado(estado, cerrados, directorio=DIRECTORIO_INCREMENTAL):
+    """
+    Guarda el lote con archivos nuevos, numerados con el lote, y recién después reemplaza
+    estado.json, que dice cuáles valen. Si el proceso se corta antes, estado.json sigue apuntando a
+    los del lote anterior y lo escrito a medias no se lee: el lote se vuelve a procesar entero.
+    """
+    lote = estado['lote'] + 1
+    ruta_estado, ruta_pendientes, ruta_recientes, directorio_incidentes = _rutas(directorio, lote)
+    os.makedirs(directorio_incidentes, exist_ok=True)
+    archivos = list(estado['archivos_incidentes'])
+    if len(cerrados):
+        archivos.append(f'lote_{lote:06d}.parquet')
+        cerrados.to_parquet(os.path.join(directorio_incidentes, archivos[-1]), index=False)
+    if estado['pendientes'] is not None:
+        estado['pendientes'].to_parquet(ruta_pendientes, index=False)
+        estado['recientes'].to_parquet(ruta_recientes, index=False)
+
+    datos = {clave: valor for clave, valor in estado.items() if clave not in ('pendientes', 'recientes')}
+    datos.update(lote=lote, archivos_incidentes=archivos)
+    temporal = f"{ruta_estado}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, indent=2)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta_estado)
+    estado.update(lote=lote, archivos_incidentes=archivos)
+
+    # Los pendientes del lote anterior ya no se usan
+    for ruta in _rutas(directorio, lote - 1)[1:3]:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+def reiniciar_estado(directorio=DIRECTORIO_INCREMENTAL):
+    if os.path.isdir(directorio):
+        shutil.rmtree(directorio)
+
+
+def procesar_lote(df, caidas_repetidas=False, ventana_reboot='2min', margen_reboot='2min',
+                  directorio=DIRECTORIO_INCREMENTAL):
+    """
+    Procesa un export nuevo sobre el estado guardado: cierra las caídas que quedaron abiertas,
+    agrega al almacén los incidentes que ya no pueden cambiar y devuelve los cerrados en este lote.
+    """
+    estado = cargar_estado(directorio)
+    if estado is None:
+        estado = nuevo_estado(caidas_repetidas, ventana_reboot, margen_reboot)
+    elif estado['parametros'] != nuevo_estado(caidas_repetidas, ventana_reboot, margen_reboot)['parametros']:
+        raise ValueError("El estado incremental se generó con otros parámetros; reinícielo antes de continuar")
+
+    estado, cerrados = avanzar(estado, df)
+    guardar_estado(estado, cerrados, directorio)
+    return tabla_incidentes([cerrados])
+
+
+def leer_almacen(directorio=DIRECTORIO_INCREMENTAL):
+    """Todos los incidentes: los del almacén más los que aún pueden cambiar con el próximo lote."""
+    estado = cargar_estado(directorio)
+    if estado is None or estado['pendientes'] is None:
+        return tabla_incidentes([])
+    # Solo los lotes que estado.json registra: un lote cortado antes de guardar el estado no cuenta
+    directorio_incidentes = _rutas(directorio, estado['lote'])[3]
+    partes = [pd.read_parquet(os.path.join(directorio_incidentes, nombre)) for nombre in estado['archivos_incidentes']]
+    return tabla_incidentes(partes + [cerrar_estado(estado)])
@@ -0,0 +1,215 @@
+import argparse
+import glob
+import importlib.util
+import os
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .perfil import medir_etapa
+from .variantes import FORMATO_EVENTTIME
+
+# Columnas del export de Orion que usa el pipeline
+COLUMNAS_EVENTOS = ['EventTime', 'EventTypeName', 'Message']
+# Texto muy repetido: las categorías evitan una cadena Python por fila
+TIPOS_EVENTOS = {'EventTypeName': 'category', 'Message': 'category'}
+FILAS_ENCABEZADO = 2
+FILAS_POR_GRUPO = 100_000
+# Fracción de EventTime ilegibles que se tolera con un aviso; con más, el formato está mal y se corta
+MAXIMO_SIN_FECHA = 0.01
+
+
+def motor_excel():
+    """calamine es mucho más rápido que openpyxl; se usa solo si está instalado."""
+    if importlib.util.find_spec('python_calamine') is not None:
+        return 'calamine'
+    return 'openpyxl'
+
+
+def ruta_columnar(ruta_excel):
+    return f"{os.path.splitext(ruta_excel)[0]}.eventos.parquet"
+
+
+def leer_fechas(valores, formato=FORMATO_EVENTTIME, utc=False):
+    """
+    Convierte EventTime a fechas con un formato explícito, sin que pandas lo deduzca. Unos pocos
+    valores ilegibles (hasta MAXIMO_SIN_FECHA) quedan en NaT con un aviso; si son más, el formato
+    no es el del export y se lanza ValueError en lugar de seguir con un reporte vacío o incompleto.
+    Con utc=True las fechas sin zona se toman como UTC.
+    """
+    fechas = pd.to_datetime(valores, format=formato, errors='coerce', utc=utc)
+    con_valor = np.asarray(pd.notna(valores))
+    perdidas = np.asarray(pd.isna(fechas)) & con_valor
+    if perdidas.any():
+        ejemplo = np.asarray(valores, dtype=object)[perdidas][0]
+        mensaje = (f"{perdidas.sum()} de {con_valor.sum()} EventTime no tienen el formato {formato!r} "
+                   f"(p. ej. {ejemplo!r}); revise FORMATO_EVENTTIME en variantes.py")
+        if perdidas.sum() > MAXIMO_SIN_FECHA * con_valor.sum():
+            raise ValueError(mensaje)
+        warnings.warn(f"{mensaje}; quedan sin fecha", stacklevel=2)
+    return fechas
+
+
+def leer_excel_orion(ruta_excel):
+    """Lee el export de Orion cargando solo las columnas necesarias con tipos explícitos."""
+    df = pd.read_excel(
+        ruta_excel,
+        skiprows=FILAS_ENCABEZADO,
+        usecols=COLUMNAS_EVENTOS,
+        dtype=TIPOS_EVENTOS,
+        engine=motor_excel(),
+    )
+    df["EventTime"] = leer_fechas(df["EventTime"])
+    return df[COLUMNAS_EVENTOS]
+
+
+def leer_parquet_orion(ruta_parquet):
+    """Lee los eventos de un Parquet cargando el texto directamente como categorías."""
+    columnas_categoricas = [columna for columna, tipo in TIPOS_EVENTOS.items() if tipo == 'category']
+    df = pd.read_parquet(ruta_parquet, columns=COLUMNAS_EVENTOS, read_dictionary=columnas_categoricas)
+    return df.astype(TIPOS_EVENTOS)
+
+
+def columnar_vigente(ruta_excel, ruta_parquet=None):
+    """El archivo columnar vale mientras sea más reciente que el Excel del que salió."""
+    ruta_parquet = ruta_parquet or ruta_columnar(ruta_excel)
+    if not os.path.exists(ruta_parquet):
+        return False
+    if not os.path.exists(ruta_excel):
+        return True
+    return os.stat(ruta_parquet).st_mtime_ns >= os.stat(ruta_excel).st_mtime_ns
+
+
+@medir_etapa()
+def convertir_a_columnar(ruta_excel, ruta_parquet=None):
+    """
+    Convierte una vez el export de Orion a Parquet comprimido y devuelve la ruta generada. Los
+    eventos quedan ordenados por EventTime (los empates conservan el orden del archivo) para que
+    streaming.py pueda recorrerlo por bloques.
+    """
+    ruta_parquet = ruta_parquet or ruta_columnar(ruta_excel)
+    df = leer_excel_orion(ruta_excel).sort_values('EventTime', kind='mergesort')
+    df.to_parquet(ruta_parquet, index=False, compression='zstd', row_group_size=FILAS_POR_GRUPO)
+    return ruta_parquet
+
+
+@medir_etapa()
+def leer_eventos(ruta_archivo):
+    """
+    Devuelve los eventos del export. Usa el Parquet generado por convertir_a_columnar si existe y
+    está al día; si no, lee el Excel directamente.
+    """
+    if ruta_archivo.endswith('.parquet'):
+        return leer_parquet_orion(ruta_archivo)
+    if columnar_vigente(ruta_archivo):
+        return leer_parquet_orion(ruta_columnar(ruta_archivo))
+    return leer_excel_orion(ruta_archivo)
+
+
+def expandir_rutas(entrada):
+    """
+    Archivos de una ruta, un patrón glob ('files/orion_*.xlsx') o una lista de ellos, en el orden
+    indicado (los de cada patrón, por nombre) y sin repetir.
+    """
+    if isinstance(entrada, (str, os.PathLike)):
+        entrada = [entrada]
+    rutas = []
+    for ruta in map(os.fspath, entrada):
+        if any(caracter in ruta for caracter in '*?['):
+            coincidencias = sorted(glob.glob(ruta))
+            if not coincidencias:
+                raise FileNotFoundError(f"Ningún archivo coincide con {ruta}")
+            rutas.extend(coincidencias)
+        else:
+            rutas.append(ruta)
+    return list(dict.fromkeys(rutas))
+
+
+def huella_eventos(df):
+    """
+    Hash de 64 bits de (EventTime, EventTypeName, Message) por fila. Es el mismo para un evento
+    venga del Excel o del Parquet: las categorías se hashean por su texto, no por sus códigos, y
+    EventTime se lleva siempre a nanosegundos.
+    """
+    claves = df[COLUMNAS_EVENTOS].assign(EventTime=df['EventTime'].astype('datetime64[ns]'))
+    return pd.util.hash_pandas_object(claves, index=False).to_numpy()
+
+
+def _leer_export(ruta, ruta_resultado=None):
+    """Eventos de un export ordenados por EventTime, con su huella y su número de repetición en el archivo."""
+    df = leer_eventos(ruta).sort_values('EventTime', kind='mergesort', ignore_index=True)
+    df['Huella'] = huella_eventos(df)
+    # Un evento que el mismo archivo trae dos veces se conserva dos veces
+    df['Repeticion'] = df.groupby('Huella', sort=False).cumcount().to_numpy()
+    if ruta_resultado is None:
+        return df
+    from .paralelo import escribir_arrow
+
+    escribir_arrow(df, ruta_resultado)
+    return ruta_resultado
+
+
+def unir_exports(partes):
+    """
+    Une los eventos de varios exports (cada uno ordenado por EventTime) en un solo flujo ordenado.
+    Un evento que aparece en varios archivos queda una sola vez, la del primero; los empates de
+    EventTime conservan el orden de los archivos y, dentro de cada uno, el del archivo.
+    """
+    columnas = {}
+    for columna in partes[0].columns:
+        if isinstance(partes[0][columna].dtype, pd.CategoricalDtype):
+            columnas[columna] = union_categoricals([parte[columna] for parte in partes])
+        else:
+            columnas[columna] = np.concatenate([parte[columna].to_numpy() for parte in partes])
+    df = pd.DataFrame(columnas)
+
+    df = df[~df.duplicated(['Huella', 'Repeticion'])]
+    # Cada parte ya viene ordenada: el orden estable (timsort) solo mezcla las secuencias
+    orden = np.argsort(df['EventTime'].to_numpy(), kind='stable')
+    return df.iloc[orden][COLUMNAS_EVENTOS].reset_index(drop=True)
+
+
+@medir_etapa()
+def leer_exports(entrada, workers=None):
+    """
+    Eventos de uno o varios exports (rutas, patrones glob o una lista). Con varios archivos cada uno
+    se lee en su propio proceso (hasta workers, por defecto uno por CPU) y se unen con unir_exports;
+    un solo archivo se lee como en leer_eventos.
+    """
+    rutas = expandir_rutas(entrada)
+    if len(rutas) == 1:
+        return leer_eventos(rutas[0])
+
+    workers = min(len(rutas), workers or os.cpu_count() or 1)
+    if workers == 1:
+        return unir_exports([_leer_export(ruta) for ruta in rutas])
+
+    from .paralelo import directorio_temporal, leer_arrow
+
+    # Los eventos vuelven como archivos Arrow IPC mapeados en memoria, no serializados con pickle
+    with tempfile.TemporaryDirectory(prefix='eventos_orion_', dir=directorio_temporal()) as temporal:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = [
+                pool.submit(_leer_export, ruta, os.path.join(temporal, f'export_{numero}.arrow'))
+                for numero, ruta in enumerate(rutas)
+            ]
+            partes = [leer_arrow(futuro.result()) for futuro in futuros]
+        return unir_exports(partes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte exports de Orion (Excel) a Parquet para cargas rápidas.")
+    parser.add_argument('entrada', help="Export de Orion en Excel")
+    parser.add_argument('-o', '--salida', help="Ruta del Parquet (por defecto junto al Excel)")
+    args = parser.parse_args()
+
+    ruta = convertir_a_columnar(args.entrada, args.salida)
+    print(f"✅ Archivo columnar generado: {ruta}")
+
+
+if __name__ == "__main__":
+    main()
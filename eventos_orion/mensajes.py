@@ -0,0 +1,36 @@
+import re
+from functools import lru_cache
+
+# Reglas de texto de los eventos sin pandas, para que el modo en vivo no tenga que cargarlo;
+# procesamiento.py las aplica de forma vectorizada
+COLUMNAS_INCIDENTES = ['Enlace', 'Fecha Down', 'Fecha Up', 'Tiempo', 'Estado', 'Agencia_base', 'Proveedor']
+FRASES_CLAVE = ['has stopped responding', 'rebooted', 'is responding again']
+ESTADOS = ['Caído y recuperado', 'Reboot', 'Caído']
+
+
+@lru_cache(maxsize=None)
+def compilar_clasificador(proveedores, frases=tuple(FRASES_CLAVE)):
+    """
+    Una sola expresión regular que extrae proveedor, agencia base y frase del evento.
+
+    Cada alternativa se prueba sobre todo el mensaje antes de pasar a la siguiente, así que gana
+    el primer proveedor (o frase) de la lista, no el que aparece antes en el texto.
+    """
+    alternativas_proveedor = '|'.join(f'.*?(?P<p{i}>{re.escape(p)})' for i, p in enumerate(proveedores))
+    alternativas_frase = '|'.join(f'(?P<a{i}>.*?)(?P<f{i}>{re.escape(f)})' for i, f in enumerate(frases))
+    return re.compile(f'(?is)^(?=(?:{alternativas_proveedor})?)(?:{alternativas_frase})?')
+
+
+@lru_cache(maxsize=2 ** 16)
+def campos_mensaje(mensaje, proveedores, frases=tuple(FRASES_CLAVE)):
+    """
+    (Proveedor, Agencia_base) de un solo mensaje con las reglas de extraer_campos_mensaje, para
+    procesar eventos de uno en uno. Proveedor es None si el mensaje no nombra ninguno.
+    """
+    if not isinstance(mensaje, str):
+        return None, None
+    grupos = compilar_clasificador(proveedores, frases).search(mensaje).groupdict()
+    proveedor = next((p.capitalize() for i, p in enumerate(proveedores) if grupos[f'p{i}'] is not None), None)
+    frase = next((i for i in range(len(frases)) if grupos[f'f{i}'] is not None), None)
+    agencia = mensaje if frase is None else grupos[f'a{frase}']
+    return proveedor, agencia.strip()
@@ -0,0 +1,65 @@
+import argparse
+from datetime import datetime
+
+from .perfil import activar_desde_argumentos, agregar_argumentos
+
+# Opción del menú -> tipo de reporte
+OPCIONES_REPORTE = {"1": 'madrugada', "2": 'dia', "3": 'standby'}
+
+
+def pedir_rango_fechas():
+    # 🗓️ Pedir fechas al usuario
+    inicio_str = input("📅 Ingresa la fecha de inicio (dd/mm/yyyy): ")
+    fin_str = input("📅 Ingresa la fecha de fin (dd/mm/yyyy): ")
+    inicio = datetime.strptime(inicio_str, "%d/%m/%Y")
+    fin = datetime.strptime(fin_str, "%d/%m/%Y")
+    return inicio, fin
+
+
+def main(variante='main', argv=None):
+    parser = argparse.ArgumentParser(description="Reportes de incidentes de enlaces a partir del export de Orion.")
+    parser.add_argument('--workers', type=int, default=1, help="Procesos para analizar las agencias en paralelo")
+    agregar_argumentos(parser)
+    args = parser.parse_args(argv)
+    activar_desde_argumentos(args)
+
+    # pandas se carga recién aquí, después de --help
+    from .cache import invalidar_cache
+    from .pipeline import Pipeline
+
+    pipeline = Pipeline(variante, args.workers)
+    flag=True
+    while flag:
+        print("1.- Reporte madrugada")
+        print("2.- Reporte del día")
+        print("3.- Reporte Madrugada Standy")
+        print("4.- Salir")
+        print("5.- Limpiar caché de procesamiento")
+        print("6.- Procesar export incremental")
+        print("7.- Procesar export por bloques")
+        print("8.- Guardar incidentes en el almacén")
+        opcion=input("Seleccionar una opcion: ")
+        if opcion in OPCIONES_REPORTE:
+            tipo = OPCIONES_REPORTE[opcion]
+            if tipo not in pipeline.reportes:
+                print("En mantenimiento")
+                continue
+            df_corregido = pipeline.procesar()
+            print(":::: Se ha procesado los datos ::::")
+            fecha_inicio, fecha_fin = pedir_rango_fechas()
+            ruta = pipeline.reportar(df_corregido, tipo, fecha_inicio, fecha_fin)
+            print(f"✅ Archivo generado exitosamente: {ruta}")
+        elif opcion=="4":
+            flag=False
+        elif opcion=="5":
+            invalidar_cache()
+            print(":::: Se ha limpiado la caché ::::")
+        elif opcion=="6":
+            incidentes = pipeline.procesar_incremental()
+            print(f":::: Se ha procesado el lote: {len(incidentes)} incidentes cerrados ::::")
+        elif opcion=="7":
+            total = pipeline.procesar_por_bloques()
+            print(f":::: Se han escrito {total} incidentes en {pipeline.config['archivo_bloques']} ::::")
+        elif opcion=="8":
+            total = pipeline.guardar_en_almacen()
+            print(f":::: Se han guardado {total} incidentes en {pipeline.config['archivo_almacen']} ::::")
@@ -0,0 +1,108 @@
+import heapq
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .perfil import medir_etapa
+from .procesamiento import analizar_incidentes, codificar, compactar_incidentes, corregir_estados_reboot, desglosar_enlaces
+
+# Más fragmentos que procesos para que una agencia grande no deje a los demás esperando
+FRAGMENTOS_POR_PROCESO = 4
+COLUMNAS_FRAGMENTO = ['EventTime', 'EventTypeName', 'Proveedor', 'Agencia_base']
+
+
+def agencias_de_eventos(df):
+    """Agencia de cada evento según su enlace, con la misma regla que corregir_estados_reboot."""
+    codigos, enlaces = pd.factorize(df['Agencia_base'])
+    bases, _, _, _ = desglosar_enlaces(enlaces)
+    agencias = np.append(bases, None)
+    return agencias[codigos]
+
+
+def repartir_agencias(agencias, n_fragmentos):
+    """
+    Reparte las agencias en n_fragmentos con un número parecido de eventos: de mayor a menor,
+    cada agencia va al fragmento con menos eventos. Devuelve el número de fragmento de cada evento
+    (-1 para eventos sin agencia). El reparto es determinista.
+    """
+    codigos, unicas = pd.factorize(pd.Series(agencias, dtype=object), sort=True)
+    conteos = np.bincount(codigos[codigos >= 0], minlength=len(unicas))
+    fragmento_agencia = np.empty(len(unicas), dtype=np.int64)
+    cargas = [(0, fragmento) for fragmento in range(min(n_fragmentos, len(unicas)))]
+    for agencia in np.argsort(-conteos, kind='stable'):
+        carga, fragmento = heapq.heappop(cargas)
+        fragmento_agencia[agencia] = fragmento
+        heapq.heappush(cargas, (carga + conteos[agencia], fragmento))
+    return np.where(codigos >= 0, fragmento_agencia[np.maximum(codigos, 0)], -1)
+
+
+def escribir_arrow(df, ruta):
+    import pyarrow as pa
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(ruta, 'wb') as destino, pa.ipc.new_file(destino, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+
+
+def leer_arrow(ruta):
+    """Lee un archivo Arrow IPC mapeado en memoria: las columnas no se copian al abrirlo."""
+    import pyarrow as pa
+
+    with pa.memory_map(ruta) as origen:
+        return pa.ipc.open_file(origen).read_all().to_pandas()
+
+
+def _procesar_fragmento(ruta_fragmento, ruta_resultado, caidas_repetidas, ventana_reboot, margen_reboot):
+    df = leer_arrow(ruta_fragmento)
+    incidentes = analizar_incidentes(df, caidas_repetidas=caidas_repetidas, ventana_reboot=ventana_reboot)
+    incidentes = corregir_estados_reboot(incidentes, margen_reboot)
+    escribir_arrow(incidentes, ruta_resultado)
+    return ruta_resultado
+
+
+def directorio_temporal():
+    # /dev/shm evita pasar los fragmentos por disco cuando existe
+    return '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+
+
+@medir_etapa()
+def procesar_en_paralelo(df, workers, caidas_repetidas=False, ventana_reboot='2min', margen_reboot='2min'):
+    """
+    analizar_incidentes + corregir_estados_reboot repartiendo las agencias entre workers procesos.
+
+    Las dos etapas solo relacionan enlaces de una misma agencia, así que cada fragmento se procesa
+    por separado. Los fragmentos y los resultados viajan como archivos Arrow IPC mapeados en memoria,
+    no como DataFrames serializados con pickle. Al unir, el orden estable por Enlace reproduce el de
+    la ejecución en serie, cuyo resultado es idéntico.
+    """
+    fragmentos = repartir_agencias(agencias_de_eventos(df), workers * FRAGMENTOS_POR_PROCESO) if workers > 1 else None
+    if fragmentos is None or fragmentos.max(initial=-1) < 1:
+        incidentes = analizar_incidentes(df, caidas_repetidas=caidas_repetidas, ventana_reboot=ventana_reboot)
+        return corregir_estados_reboot(incidentes, margen_reboot)
+
+    eventos = df[COLUMNAS_FRAGMENTO]
+    with tempfile.TemporaryDirectory(prefix='eventos_orion_', dir=directorio_temporal()) as temporal:
+        tareas = []
+        for fragmento in range(fragmentos.max() + 1):
+            ruta = os.path.join(temporal, f'fragmento_{fragmento}.arrow')
+            escribir_arrow(eventos[fragmentos == fragmento], ruta)
+            tareas.append((ruta, os.path.join(temporal, f'resultado_{fragmento}.arrow')))
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = [
+                pool.submit(_procesar_fragmento, ruta, resultado, caidas_repetidas, ventana_reboot, margen_reboot)
+                for ruta, resultado in tareas
+            ]
+            partes = [leer_arrow(futuro.result()) for futuro in futuros]
+
+    # Cada Enlace está en un solo fragmento: basta un orden estable por Enlace
+    incidentes = pd.concat(partes, ignore_index=True)
+    _, enlaces = codificar(df['Agencia_base'])
+    incidentes['Enlace'] = pd.Categorical(incidentes['Enlace'].astype(object), categories=enlaces)
+    incidentes = incidentes.sort_values('Enlace', kind='mergesort', ignore_index=True)
+    incidentes['Agencia_base'] = incidentes['Agencia_base'].astype(object)
+    incidentes['Proveedor'] = incidentes['Proveedor'].astype(object)
+    return compactar_incidentes(incidentes)
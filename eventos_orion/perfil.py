@@ -0,0 +1,228 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUTA_PERFIL = "files/perfil.json"
+# Cada cuánto se mide la memoria mientras el perfil está activo
+INTERVALO_MUESTREO = 0.005
+
+# Estado del perfil de esta ejecución; None mientras no se active con --profile
+_perfil = None
+_local = threading.local()
+
+
+def memoria_actual():
+    """RSS actual en bytes (psutil si está instalado, /proc en Linux) o None si no se puede medir."""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def _pico_historico():
+    if resource is None:
+        return memoria_actual() or 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _cpu_hijos():
+    if resource is None:
+        return 0.0
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return uso.ru_utime + uso.ru_stime
+
+
+def _muestrear(perfil):
+    while not perfil['detener'].wait(INTERVALO_MUESTREO):
+        rss = memoria_actual()
+        if rss is not None:
+            with perfil['bloqueo']:
+                perfil['muestras'].append((time.perf_counter(), rss))
+
+
+def activar(ruta_volcado=None):
+    """
+    Empieza a registrar las etapas decoradas con medir_etapa. Con ruta_volcado también se perfila
+    función por función: pyinstrument si la ruta termina en .html (y está instalado), cProfile si no.
+    """
+    global _perfil
+    _perfil = {
+        'inicio': time.perf_counter(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'etapas': [],
+        'muestras': [],
+        'bloqueo': threading.Lock(),
+        'detener': threading.Event(),
+        'ruta_volcado': ruta_volcado,
+        'perfilador': None,
+    }
+    if ruta_volcado and ruta_volcado.endswith('.html'):
+        from pyinstrument import Profiler
+
+        _perfil['perfilador'] = Profiler()
+        _perfil['perfilador'].start()
+    elif ruta_volcado:
+        import cProfile
+
+        _perfil['perfilador'] = cProfile.Profile()
+        _perfil['perfilador'].enable()
+    hilo = threading.Thread(target=_muestrear, args=(_perfil,), daemon=True)
+    hilo.start()
+    _perfil['hilo'] = hilo
+
+
+def activo():
+    return _perfil is not None
+
+
+def _filas(valor, contar_numeros=False):
+    """Filas de un DataFrame o Series; con contar_numeros un entero devuelto se toma como filas escritas."""
+    if hasattr(valor, 'shape') and hasattr(valor, 'index'):
+        return int(valor.shape[0])
+    if contar_numeros and isinstance(valor, int) and not isinstance(valor, bool):
+        return valor
+    return None
+
+
+def _pico_en(perfil, inicio, fin):
+    with perfil['bloqueo']:
+        muestras = perfil['muestras']
+        desde = bisect_left(muestras, (inicio,))
+        valores = [rss for instante, rss in muestras[desde:] if instante <= fin]
+    return max(valores) if valores else None
+
+
+def medir_etapa(nombre=None):
+    """
+    Decorador que, con el perfil activo, registra por llamada el tiempo real, el tiempo de CPU
+    (del hilo y de los procesos hijos que terminaron durante la etapa), las filas de entrada (del
+    primer argumento) y de salida, y el pico de memoria. Sin perfil solo llama a la función.
+    """
+    def decorar(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            perfil = _perfil
+            if perfil is None:
+                return funcion(*args, **kwargs)
+
+            nivel = getattr(_local, 'nivel', 0)
+            _local.nivel = nivel + 1
+            inicio, cpu, cpu_hijos = time.perf_counter(), time.thread_time(), _cpu_hijos()
+            rss_inicio = memoria_actual()
+            try:
+                resultado = funcion(*args, **kwargs)
+            finally:
+                _local.nivel = nivel
+            fin = time.perf_counter()
+            medidas = [valor for valor in (_pico_en(perfil, inicio, fin), rss_inicio, memoria_actual()) if valor is not None]
+            pico = max(medidas) if medidas else _pico_historico()
+
+            registro = {
+                'etapa': etiqueta,
+                'nivel': nivel,
+                'hilo': threading.current_thread().name,
+                'inicio_s': round(inicio - perfil['inicio'], 4),
+                'tiempo_s': round(fin - inicio, 4),
+                'cpu_s': round(time.thread_time() - cpu + _cpu_hijos() - cpu_hijos, 4),
+                'filas_entrada': _filas(args[0]) if args else None,
+                'filas_salida': _filas(resultado, contar_numeros=True),
+                'pico_memoria_mb': round(pico / 2 ** 20, 1),
+            }
+            with perfil['bloqueo']:
+                perfil['etapas'].append(registro)
+            return resultado
+
+        return envoltura
+    return decorar
+
+
+def reporte():
+    """Las llamadas registradas en orden y un resumen por etapa."""
+    if _perfil is None:
+        return None
+    with _perfil['bloqueo']:
+        etapas = sorted(_perfil['etapas'], key=lambda registro: registro['inicio_s'])
+    resumen = {}
+    for registro in etapas:
+        total = resumen.setdefault(registro['etapa'], {
+            'llamadas': 0, 'tiempo_s': 0.0, 'cpu_s': 0.0, 'filas_entrada': 0, 'filas_salida': 0, 'pico_memoria_mb': 0.0,
+        })
+        total['llamadas'] += 1
+        for clave in ('tiempo_s', 'cpu_s'):
+            total[clave] = round(total[clave] + registro[clave], 4)
+        for clave in ('filas_entrada', 'filas_salida'):
+            total[clave] += registro[clave] or 0
+        total['pico_memoria_mb'] = max(total['pico_memoria_mb'], registro['pico_memoria_mb'])
+    return {
+        'fecha': _perfil['fecha'],
+        'tiempo_total_s': round(time.perf_counter() - _perfil['inicio'], 4),
+        'pico_memoria_mb': round(_pico_historico() / 2 ** 20, 1),
+        'resumen': resumen,
+        'etapas': etapas,
+    }
+
+
+def guardar(ruta):
+    """Detiene el perfil, escribe el reporte JSON en ruta y, si se pidió, el volcado por función."""
+    global _perfil
+    if _perfil is None:
+        return None
+    _perfil['detener'].set()
+    _perfil['hilo'].join()
+    datos = reporte()
+
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, indent=2, ensure_ascii=False)
+
+    perfilador, ruta_volcado = _perfil['perfilador'], _perfil['ruta_volcado']
+    if perfilador is not None and ruta_volcado.endswith('.html'):
+        perfilador.stop()
+        with open(ruta_volcado, 'w', encoding='utf-8') as archivo:
+            archivo.write(perfilador.output_html())
+    elif perfilador is not None:
+        perfilador.disable()
+        perfilador.dump_stats(ruta_volcado)
+    _perfil = None
+    return datos
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--profile', nargs='?', const=RUTA_PERFIL, default=None, metavar='RUTA_JSON',
+                        help=f"Mide tiempo, CPU, filas y memoria por etapa y guarda el reporte JSON (por defecto {RUTA_PERFIL})")
+    parser.add_argument('--profile-dump', default=None, metavar='RUTA',
+                        help="Con --profile, guarda además el perfil por función (.prof de cProfile o .html de pyinstrument)")
+
+
+def activar_desde_argumentos(args):
+    """Activa el perfil si se pidió --profile; el reporte se guarda al terminar el programa."""
+    if not args.profile:
+        return
+    activar(args.profile_dump)
+
+    def guardar_al_salir():
+        if guardar(args.profile) is not None:
+            print(f"📊 Perfil guardado en {args.profile}")
+
+    atexit.register(guardar_al_salir)
@@ -0,0 +1,205 @@
+import pandas as pd
+
+from .almacen import abrir_almacen, consultar_enlaces, consultar_incidentes, guardar_incidentes
+from .cache import obtener_procesado
+from .flapping import agrupar_flapping
+from .incremental import procesar_lote
+from .ingesta import expandir_rutas, leer_exports, leer_fechas
+from .mensajes import FRASES_CLAVE
+from .paralelo import procesar_en_paralelo
+from .perfil import medir_etapa
+from .procesamiento import analizar_incidentes, corregir_estados_reboot, extraer_campos_mensaje
+from .resumen import actualizar_resumen, agregados_diarios, enlaces_por_grupo, escribir_resumen
+from .salida import EscritorReporte
+from .streaming import FILAS_POR_BLOQUE, procesar_por_bloques
+from .turnos import asignar_turnos, escribir_hojas_turnos, fechas_con_caidas, fechas_rango, rango_turnos, seleccionar_turnos
+from .variantes import (
+    ARCHIVO_ENTRADA, FLAPPING, FORMATO_EVENTTIME, FORMATOS_REPORTE, MARGEN_REBOOT, NOMBRES_REPORTE, PROVEEDORES_VALIDOS,
+    REDONDEAR_MINUTO, VARIANTES, VENTANA_REBOOT, ZONA_HORARIA,
+)
+
+
+@medir_etapa()
+def cargar_datos(ruta_archivo, workers=None, zona_horaria=ZONA_HORARIA, redondear_minuto=REDONDEAR_MINUTO):
+    # ruta_archivo también puede ser un patrón glob o una lista de exports que se solapan
+    return ajustar_horas(leer_exports(ruta_archivo, workers), zona_horaria, redondear_minuto)
+
+
+def ajustar_horas(df, zona_horaria=ZONA_HORARIA, redondear_minuto=REDONDEAR_MINUTO):
+    """
+    Pasa EventTime de UTC a la hora local de zona_horaria, sin zona como el resto del pipeline, y
+    opcionalmente lo redondea al minuto. Todo sobre la columna completa: después no se vuelve a
+    ajustar fila por fila.
+    """
+    tiempos = leer_fechas(df["EventTime"], utc=True).dt.tz_convert(zona_horaria).dt.tz_localize(None)
+    df["EventTime"] = tiempos.dt.floor('min') if redondear_minuto else tiempos
+    return df
+
+
+@medir_etapa()
+def preprocesar_datos(df, proveedores=PROVEEDORES_VALIDOS):
+    # Proveedor, agencia base y frase salen de una sola pasada por mensaje único
+    campos = extraer_campos_mensaje(df["Message"], proveedores)
+    df["Proveedor"] = campos["Proveedor"]
+    df = df[df["Proveedor"].notnull()]
+    df["Agencia_base"] = campos["Agencia_base"]
+    return df
+
+
+@medir_etapa()
+def analizar_eventos(df, caidas_repetidas=False, ventana_reboot=VENTANA_REBOOT):
+    return analizar_incidentes(df, caidas_repetidas=caidas_repetidas, ventana_reboot=ventana_reboot)
+
+
+def generar_hojas(df, escritor, reporte, fecha_inicio, fecha_fin):
+    """Hojas de un tipo de reporte, según su entrada en VARIANTES[...]['reportes']."""
+    if reporte['fechas'] == 'con_caidas':
+        fechas = fechas_con_caidas(df, fecha_inicio, fecha_fin)
+    else:
+        fechas = fechas_rango(fecha_inicio, fecha_fin)
+    turnos = seleccionar_turnos(*reporte['turnos'])
+    etiquetas = asignar_turnos(df, turnos, fechas, incluir_up=reporte.get('incluir_up', False))
+    escribir_hojas_turnos(df, escritor, etiquetas, turnos, ordenar_por=reporte.get('ordenar_por'))
+
+
+@medir_etapa()
+def escribir_reporte(df_corregido, reporte, ruta, fecha_inicio, fecha_fin, formatos=FORMATOS_REPORTE, flapping=None,
+                     resumen=None):
+    # Con flapping ({'ventana', 'caidas'}) las ráfagas de caídas de un enlace van en una sola fila
+    incidentes = agrupar_flapping(df_corregido, **flapping) if flapping else df_corregido
+    with EscritorReporte(ruta, formatos) as writer:
+        writer.hoja('Incidentes Total', incidentes)
+        generar_hojas(incidentes, writer, reporte, fecha_inicio, fecha_fin)
+        # Minutos caídos, percentiles y disponibilidad por proveedor y por agencia en el rango del reporte;
+        # resumen trae los agregados ya calculados cuando df_corregido no cubre los días completos
+        agregados = agregados_diarios(df_corregido) if resumen is None else resumen
+        escribir_resumen(writer, agregados, fecha_inicio, fecha_fin)
+
+
+@medir_etapa()
+def consultar_reporte(fecha_inicio, fecha_fin, ruta_almacen):
+    # Solo los incidentes que pueden caer en algún turno de los días pedidos, por su Fecha Down o su Fecha Up
+    desde, hasta = rango_turnos(fecha_inicio, fecha_fin)
+    conexion = abrir_almacen(ruta_almacen)
+    try:
+        return consultar_incidentes(conexion, desde, hasta, incluir_up=True)
+    finally:
+        conexion.close()
+
+
+@medir_etapa()
+def consultar_resumen(fecha_inicio, fecha_fin, ruta_almacen):
+    """
+    Agregados diarios para el resumen de un reporte sacado del almacén. El resumen va por días
+    calendario completos, no por la ventana de los turnos que devuelve consultar_reporte, y la
+    disponibilidad cuenta todos los enlaces guardados, también los que no cayeron en el rango.
+    """
+    desde = pd.Timestamp(fecha_inicio).normalize()
+    hasta = pd.Timestamp(fecha_fin).normalize() + pd.Timedelta(days=1)
+    conexion = abrir_almacen(ruta_almacen)
+    try:
+        # Con incluir_up también entran los que caen antes del rango y vuelven dentro de él
+        agregados = agregados_diarios(consultar_incidentes(conexion, desde, hasta, incluir_up=True))
+        agregados['enlaces'] = enlaces_por_grupo(consultar_enlaces(conexion))
+        return agregados
+    finally:
+        conexion.close()
+
+
+class Pipeline:
+    """
+    Etapas del procesamiento con las reglas de una variante de VARIANTES: cargar → clasificar →
+    emparejar → corregir → reportar. procesar() encadena las cuatro primeras con caché y, con
+    workers > 1, reparte las agencias entre procesos.
+    """
+
+    def __init__(self, variante='main', workers=1, formatos=FORMATOS_REPORTE, zona_horaria=ZONA_HORARIA,
+                 redondear_minuto=REDONDEAR_MINUTO, flapping=FLAPPING):
+        self.variante = variante
+        self.config = VARIANTES[variante]
+        self.caidas_repetidas = self.config['caidas_repetidas']
+        self.reportes = self.config['reportes']
+        self.workers = workers
+        self.formatos = tuple(formatos)
+        self.zona_horaria = zona_horaria
+        self.redondear_minuto = redondear_minuto
+        self.flapping = flapping
+
+    def cargar(self, ruta_archivo=ARCHIVO_ENTRADA):
+        return cargar_datos(ruta_archivo, zona_horaria=self.zona_horaria, redondear_minuto=self.redondear_minuto)
+
+    def clasificar(self, df):
+        return preprocesar_datos(df)
+
+    def emparejar(self, df):
+        return analizar_eventos(df, self.caidas_repetidas, VENTANA_REBOOT)
+
+    def corregir(self, df):
+        return corregir_estados_reboot(df, MARGEN_REBOOT)
+
+    def procesar_archivo(self, ruta_archivo=ARCHIVO_ENTRADA):
+        df_limpio = self.clasificar(self.cargar(ruta_archivo))
+        if self.workers > 1:
+            # Las agencias se reparten entre procesos; el resultado es el mismo que en serie
+            return procesar_en_paralelo(df_limpio, self.workers, self.caidas_repetidas, VENTANA_REBOOT, MARGEN_REBOOT)
+        return self.corregir(self.emparejar(df_limpio))
+
+    def procesar(self, ruta_archivo=ARCHIVO_ENTRADA):
+        # El resultado se reutiliza entre llamadas y entre ejecuciones mientras los archivos no cambien;
+        # un patrón glob se expande antes, así que un export nuevo que coincide cambia la clave
+        rutas = expandir_rutas(ruta_archivo)
+        # Todo lo que cambia los incidentes forma parte de la clave: un proveedor nuevo en variantes.py
+        # o un FORMATO_EVENTTIME distinto no reutilizan resultados viejos
+        parametros = {
+            'variante': self.variante, 'ventana_reboot': VENTANA_REBOOT, 'margen_reboot': MARGEN_REBOOT,
+            'zona_horaria': self.zona_horaria, 'redondear_minuto': self.redondear_minuto,
+            'proveedores': list(PROVEEDORES_VALIDOS), 'frases': list(FRASES_CLAVE), 'formato_eventtime': FORMATO_EVENTTIME,
+        }
+        return obtener_procesado(rutas[0] if len(rutas) == 1 else rutas, self.procesar_archivo, parametros)
+
+    def ruta_reporte(self, tipo, fecha_inicio, fecha_fin):
+        return self.config['archivo_salida'].format(inicio=fecha_inicio, fin=fecha_fin, nombre=NOMBRES_REPORTE[tipo])
+
+    def reportar(self, df_corregido, tipo, fecha_inicio, fecha_fin, ruta=None, resumen=None):
+        """Escribe el reporte tipo del rango y devuelve su ruta (con resumen, los agregados de consultar_resumen)."""
+        if tipo not in self.reportes:
+            raise ValueError(f"El reporte {tipo!r} no está disponible en la variante {self.variante}")
+        ruta = ruta or self.ruta_reporte(tipo, fecha_inicio, fecha_fin)
+        escribir_reporte(
+            df_corregido, self.reportes[tipo], ruta, fecha_inicio, fecha_fin, self.formatos, self.flapping, resumen,
+        )
+        return ruta
+
+    def consultar(self, fecha_inicio, fecha_fin, ruta_almacen=None):
+        return consultar_reporte(fecha_inicio, fecha_fin, ruta_almacen or self.config['archivo_almacen'])
+
+    def consultar_resumen(self, fecha_inicio, fecha_fin, ruta_almacen=None):
+        return consultar_resumen(fecha_inicio, fecha_fin, ruta_almacen or self.config['archivo_almacen'])
+
+    def guardar_en_almacen(self, ruta_archivo=ARCHIVO_ENTRADA, ruta_almacen=None):
+        # Los incidentes quedan en la base para sacar reportes de cualquier rango sin volver al export
+        conexion = abrir_almacen(ruta_almacen or self.config['archivo_almacen'])
+        try:
+            return guardar_incidentes(conexion, self.procesar(ruta_archivo))
+        finally:
+            conexion.close()
+
+    def procesar_incremental(self, ruta_archivo=ARCHIVO_ENTRADA):
+        # Solo procesa lo nuevo del export y cierra las caídas que quedaron abiertas en lotes anteriores
+        incidentes = procesar_lote(
+            self.clasificar(self.cargar(ruta_archivo)),
+            caidas_repetidas=self.caidas_repetidas, ventana_reboot=VENTANA_REBOOT, margen_reboot=MARGEN_REBOOT,
+        )
+        # Los cerrados ya no cambian: se suman una sola vez a los agregados diarios
+        actualizar_resumen(incidentes)
+        return incidentes
+
+    def preparar_bloque(self, df):
+        return self.clasificar(ajustar_horas(df, self.zona_horaria, self.redondear_minuto))
+
+    def procesar_por_bloques(self, ruta_archivo=ARCHIVO_ENTRADA, ruta_salida=None, filas_por_bloque=FILAS_POR_BLOQUE):
+        # Para exports que no caben en memoria: los incidentes se escriben a medida que se cierran
+        return procesar_por_bloques(
+            ruta_archivo, ruta_salida or self.config['archivo_bloques'], self.preparar_bloque, filas_por_bloque,
+            caidas_repetidas=self.caidas_repetidas, ventana_reboot=VENTANA_REBOOT, margen_reboot=MARGEN_REBOOT,
+        )
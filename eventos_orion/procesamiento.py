@@ -0,0 +1,237 @@
+import numpy as np
+import pandas as pd
+
+from .mensajes import COLUMNAS_INCIDENTES, ESTADOS, FRASES_CLAVE, compilar_clasificador
+from .perfil import medir_etapa
+from .reglas import evaluar_reglas, reglas_analisis, reglas_correccion
+
+TIPO_ESTADO = pd.CategoricalDtype(ESTADOS)
+
+
+@medir_etapa()
+def extraer_campos_mensaje(mensajes, proveedores, frases=FRASES_CLAVE):
+    """
+    Devuelve un DataFrame con Proveedor, Agencia_base y Frase para cada mensaje.
+
+    La expresión se evalúa una sola vez por mensaje único: los nombres de enlace se repiten
+    constantemente, así que se trabaja sobre las categorías y se expande con sus códigos.
+    """
+    proveedores = tuple(proveedores)
+    frases = tuple(frases)
+    categorias = pd.Categorical(mensajes)
+    unicos = pd.Series(categorias.categories, dtype=object)
+    extraido = unicos.str.extract(compilar_clasificador(proveedores, frases))
+
+    grupos_proveedor = extraido[[f'p{i}' for i in range(len(proveedores))]].notna().to_numpy()
+    proveedor = np.where(grupos_proveedor.any(axis=1), grupos_proveedor.argmax(axis=1), -1)
+
+    grupos_frase = extraido[[f'f{i}' for i in range(len(frases))]].notna().to_numpy()
+    con_frase = grupos_frase.any(axis=1)
+    frase = np.where(con_frase, grupos_frase.argmax(axis=1), -1)
+    prefijos = extraido[[f'a{i}' for i in range(len(frases))]].to_numpy(dtype=object)
+    agencia = np.where(con_frase, prefijos[np.arange(len(unicos)), np.maximum(frase, 0)], unicos.to_numpy(dtype=object))
+    agencia, agencias = pd.factorize(pd.Series(agencia, dtype=object).str.strip(), sort=True)
+
+    # Los mensajes nulos quedan con código -1 y sin campos
+    codigos = categorias.codes
+    validos = codigos >= 0
+
+    def expandir(codigos_unicos):
+        codigos_filas = np.full(len(codigos), -1, dtype=np.int64)
+        codigos_filas[validos] = codigos_unicos[codigos[validos]]
+        return codigos_filas
+
+    return pd.DataFrame({
+        'Proveedor': pd.Categorical.from_codes(expandir(proveedor), [p.capitalize() for p in proveedores]),
+        'Agencia_base': pd.Categorical.from_codes(expandir(agencia), agencias),
+        'Frase': pd.Categorical.from_codes(expandir(frase), list(frases)),
+    }, index=mensajes.index)
+
+
+def clasificar_eventos(tipos):
+    """Devuelve los arrays booleanos (down, up, reboot) a partir de EventTypeName."""
+    if isinstance(tipos.dtype, pd.CategoricalDtype):
+        # Se clasifican solo las categorías y se expande con los códigos
+        codigos = tipos.cat.codes.to_numpy()
+        clases = clasificar_eventos(pd.Series(tipos.cat.categories, dtype=object))
+        return tuple(np.append(clase, False)[codigos] for clase in clases)
+
+    evento = tipos.astype(str).str.lower()
+    es_down = evento.str.contains('down', regex=False, na=False).to_numpy(dtype=bool)
+    # Igual que en el bucle original: 'down' tiene prioridad sobre 'up'
+    es_up = evento.str.contains('up', regex=False, na=False).to_numpy(dtype=bool) & ~es_down
+    es_reboot = evento.str.contains('reboot', regex=False, na=False).to_numpy(dtype=bool)
+    return es_down, es_up, es_reboot
+
+
+def codificar(serie):
+    """
+    Códigos enteros y categorías en orden alfabético de una columna de texto o categórica, para
+    ordenar y comparar enteros en lugar de cadenas. Los nulos quedan con código -1.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        orden = np.argsort(categorias.to_numpy(dtype=object), kind='stable')
+        rango = np.empty(len(orden) + 1, dtype=np.int64)
+        rango[orden] = np.arange(len(orden))
+        rango[-1] = -1
+        return rango[serie.cat.codes.to_numpy()], categorias[orden]
+    codigos, categorias = pd.factorize(serie, sort=True)
+    return codigos.astype(np.int64), categorias
+
+
+def emparejar_eventos(df, caidas_repetidas=False, columna_origen=None):
+    """
+    Empareja de forma vectorizada cada caída (down) con su recuperación (up) por Agencia_base.
+
+    Con caidas_repetidas=False un down repetido sin up intermedio se ignora (semántica de main.py);
+    con caidas_repetidas=True la caída anterior se registra como 'Caído' (semántica de app.py).
+    Los pares quedan con Estado 'Caído y recuperado'; la clasificación de reboot se hace aparte.
+    Si se indica columna_origen, el resultado la incluye tomada del down que abre cada incidente.
+    """
+    codigos_agencia, agencias = codificar(df['Agencia_base'])
+    codigos_proveedor, proveedores = codificar(df['Proveedor'])
+    tiempos_eventos = df['EventTime'].to_numpy()
+    es_down, es_up, _ = clasificar_eventos(df['EventTypeName'])
+
+    # Un único orden global estable por (Agencia_base, EventTime) con solo los eventos down/up
+    ordenado = np.lexsort((tiempos_eventos, codigos_agencia))
+    relevantes = ordenado[(es_down | es_up)[ordenado] & (codigos_agencia[ordenado] >= 0)]
+    down = es_down[relevantes]
+    agencia = codigos_agencia[relevantes]
+    tiempos = tiempos_eventos[relevantes]
+    proveedor_evento = codigos_proveedor[relevantes]
+    n = len(relevantes)
+
+    posiciones = np.arange(n)
+    inicio_agencia = np.ones(n, dtype=bool)
+    inicio_agencia[1:] = agencia[1:] != agencia[:-1]
+    fin_agencia = np.ones(n, dtype=bool)
+    fin_agencia[:-1] = inicio_agencia[1:]
+
+    # El estado tras cada evento es "abierto" si el evento fue down, así que basta mirar el anterior
+    previo_down = np.zeros(n, dtype=bool)
+    previo_down[1:] = down[:-1]
+    previo_down &= ~inicio_agencia
+    siguiente_down = np.zeros(n, dtype=bool)
+    siguiente_down[:-1] = down[1:]
+    siguiente_down &= ~fin_agencia
+
+    # Inicio de cada racha de downs consecutivos, propagado con un máximo acumulado
+    inicio_racha = np.where(down & ~previo_down, posiciones, 0)
+    inicio_racha = np.maximum.accumulate(inicio_racha) if n else inicio_racha
+
+    ups_cierre = posiciones[~down & previo_down]
+    if caidas_repetidas:
+        downs_par = ups_cierre - 1
+        caidas_idx = posiciones[down & siguiente_down]
+        caidas_finales = posiciones[down & fin_agencia]
+    else:
+        downs_par = inicio_racha[ups_cierre - 1]
+        caidas_idx = np.array([], dtype=np.intp)
+        caidas_finales = inicio_racha[posiciones[down & fin_agencia]]
+
+    # Las caídas finales toman el Proveedor de la última fila original del grupo
+    invertidos = codigos_agencia[::-1]
+    agencias_vistas, ultima = np.unique(invertidos, return_index=True)
+    proveedor_ultima = np.full(len(agencias) + 1, -1, dtype=np.int64)
+    proveedor_ultima[agencias_vistas] = codigos_proveedor[len(invertidos) - 1 - ultima]
+    proveedor_final = proveedor_ultima[agencia[caidas_finales]]
+
+    # Cada fila nace de un down: ordenar por su posición reproduce el orden del bucle original
+    origen = np.concatenate([downs_par, caidas_idx, caidas_finales])
+    orden = np.argsort(origen, kind='stable')
+    nat = np.full(len(caidas_idx) + len(caidas_finales), np.datetime64('NaT'), dtype=tiempos.dtype)
+    fecha_up = np.concatenate([tiempos[ups_cierre], nat])[orden]
+    proveedor = np.concatenate([proveedor_evento[ups_cierre], proveedor_evento[caidas_idx + 1], proveedor_final])[orden]
+    estado = np.repeat([0, 2], [len(ups_cierre), len(nat)])[orden]
+    enlace = pd.Categorical.from_codes(agencia[origen[orden]], agencias)
+
+    resultado = pd.DataFrame({
+        'Enlace': enlace,
+        'Fecha Down': tiempos[origen[orden]],
+        'Fecha Up': fecha_up,
+        'Tiempo': None,
+        'Estado': pd.Categorical.from_codes(estado, dtype=TIPO_ESTADO),
+        'Agencia_base': enlace,
+        'Proveedor': pd.Categorical.from_codes(proveedor, proveedores),
+    }, columns=COLUMNAS_INCIDENTES)
+    tiempo = np.round((resultado['Fecha Up'] - resultado['Fecha Down']).dt.total_seconds() / 60)
+    resultado['Tiempo'] = tiempo.astype('Int64')
+    if columna_origen is not None:
+        resultado[columna_origen] = df[columna_origen].to_numpy()[relevantes[origen[orden]]]
+    return resultado
+
+
+@medir_etapa()
+def analizar_incidentes(df, caidas_repetidas=False, ventana_reboot='2min', columna_origen=None, reglas=None):
+    """
+    Empareja los eventos y aplica las reglas de análisis (por defecto reglas_analisis: 'Reboot' para
+    los pares con un reboot de la agencia dentro de ±ventana_reboot del up).
+    """
+    reglas = reglas_analisis(ventana_reboot) if reglas is None else reglas
+    _, _, es_reboot = clasificar_eventos(df['EventTypeName'])
+    # Las fuentes de las reglas son los reboots: su EventTime se compara con la Fecha Up de cada par
+    reboots = df.loc[es_reboot, ['Agencia_base', 'EventTime']].rename(columns={'EventTime': 'Fecha Up'})
+    resultado = emparejar_eventos(df, caidas_repetidas=caidas_repetidas, columna_origen=columna_origen)
+
+    marcados = evaluar_reglas(resultado, reglas, fuentes=reboots)
+    for regla, marcado in zip(reglas, marcados):
+        resultado.loc[marcado, 'Estado'] = regla['estado']
+    return resultado
+
+
+def desglosar_enlaces(enlaces):
+    """
+    Separa nombres de enlace ('<agencia> Principal|Backup <proveedor>') en arrays de agencia,
+    proveedor y si es Principal o Backup.
+    """
+    partes = [str(enlace).split() for enlace in enlaces]
+    bases = np.array([' '.join(p[:-1]).replace("Principal", "").replace("Backup", "").strip() for p in partes], dtype=object)
+    proveedores = np.array([p[-1] for p in partes], dtype=object)
+    principal = np.array(['principal' in str(enlace).lower() for enlace in enlaces], dtype=bool)
+    backup = np.array(['backup' in str(enlace).lower() for enlace in enlaces], dtype=bool)
+    return bases, proveedores, principal, backup
+
+
+@medir_etapa()
+def corregir_estados_reboot(df, time_margin='2min', reglas=None):
+    """
+    Aplica las reglas de corrección entre enlaces de la misma agencia (por defecto reglas_correccion:
+    el estado 'Reboot' pasa a un Backup que cae y vuelve junto a un Principal en Reboot y a cualquier
+    enlace que cae y vuelve junto a otro proveedor en Reboot, con tolerancia time_margin). Además de
+    las columnas de df, las reglas pueden usar Principal y Backup, que salen del nombre del enlace.
+    Modifica y devuelve el mismo DataFrame.
+    """
+    reglas = reglas_correccion(time_margin) if reglas is None else reglas
+    df['Fecha Down'] = pd.to_datetime(df['Fecha Down'], errors='coerce')
+    df['Fecha Up'] = pd.to_datetime(df['Fecha Up'], errors='coerce')
+
+    # Los nombres de enlace se repiten mucho: se procesan una vez por valor único
+    codigos, enlaces = pd.factorize(df['Enlace'])
+    bases, proveedores, principal, backup = desglosar_enlaces(enlaces)
+
+    df['Agencia_base'] = pd.Categorical(bases)[codigos]
+    df['Proveedor'] = pd.Categorical(proveedores)[codigos]
+
+    tabla = {columna: df[columna] for columna in df.columns}
+    tabla.update({
+        'Agencia_base': bases[codigos], 'Proveedor': proveedores[codigos],
+        'Principal': principal[codigos], 'Backup': backup[codigos],
+    })
+    marcados = evaluar_reglas(tabla, reglas)
+    # Las reglas ya se evaluaron sobre los estados de entrada: se puede ajustar df sin copiarlo
+    for regla, marcado in zip(reglas, marcados):
+        df.loc[marcado, 'Estado'] = regla['estado']
+
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+
+def compactar_incidentes(df):
+    """Tipos compactos para la tabla de incidentes: categorías para el texto repetido e Int64 para Tiempo."""
+    for columna in ('Enlace', 'Agencia_base', 'Proveedor'):
+        df[columna] = df[columna].astype('category')
+    df['Estado'] = df['Estado'].astype(TIPO_ESTADO)
+    df['Tiempo'] = df['Tiempo'].astype('Int64')
+    return df
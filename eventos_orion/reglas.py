@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+# Reglas de estado declarativas. Cada regla es un dict con:
+#   'objetivo': condiciones de las filas que puede cambiar, {columna: valor o lista de valores}
+#   'fuente': condiciones de las filas que la disparan (opcional)
+#   'cerca': {columna: tolerancia}; fuente y objetivo difieren a lo sumo eso en cada columna
+#   'distinto': columnas en las que fuente y objetivo deben diferir (opcional)
+#   'estado': el Estado que toma el objetivo
+# Fuente y objetivo son siempre filas distintas del mismo grupo (Agencia_base). La primera columna
+# de 'cerca' tiene que ser de fechas: las reglas que la comparten se evalúan con un único join por
+# intervalos, así que una regla más solo agrega comparaciones sobre los candidatos de ese join.
+
+
+def reglas_analisis(ventana='2min'):
+    """Reglas de analizar_incidentes; sus fuentes son los reboots, con su EventTime como 'Fecha Up'."""
+    return [
+        # Un par down/up con un reboot de la agencia a menos de ventana del up
+        {'objetivo': {'Estado': 'Caído y recuperado'}, 'cerca': {'Fecha Up': ventana}, 'estado': 'Reboot'},
+    ]
+
+
+def reglas_correccion(margen='2min'):
+    """Reglas de corregir_estados_reboot, con la tolerancia margen en Fecha Down y Fecha Up."""
+    cerca = {'Fecha Down': margen, 'Fecha Up': margen}
+    return [
+        # Un Backup 'Caído y recuperado' que cae y vuelve junto a un Principal en Reboot
+        {'fuente': {'Estado': 'Reboot', 'Principal': True}, 'objetivo': {'Estado': 'Caído y recuperado', 'Backup': True},
+         'cerca': cerca, 'estado': 'Reboot'},
+        # Cualquier enlace que cae y vuelve junto a otro proveedor de la misma agencia en Reboot
+        {'fuente': {'Estado': 'Reboot'}, 'objetivo': {'Estado': ['Caído y recuperado', 'Caído']},
+         'cerca': cerca, 'distinto': ['Proveedor'], 'estado': 'Reboot'},
+    ]
+
+
+def indexar_por_grupo(grupos, tiempos):
+    """
+    Ordena los pares (grupo, instante) en una única clave global para buscar ventanas con
+    np.searchsorted: los grupos se separan con un desplazamiento en el espacio de rangos de los
+    instantes, así que no hay riesgo de overflow aunque haya miles de agencias.
+    """
+    tiempos = np.asarray(tiempos).astype('datetime64[ns]')
+    categorias = pd.Index(pd.unique(np.asarray(grupos, dtype=object)))
+    instantes = np.unique(tiempos[~np.isnat(tiempos)])
+    codigos = categorias.get_indexer(np.asarray(grupos, dtype=object))
+    claves = codigos * (len(instantes) + 1) + np.searchsorted(instantes, tiempos)
+    orden = np.argsort(claves, kind='stable')
+    return {'agencias': categorias, 'instantes': instantes, 'claves': claves[orden], 'orden': orden}
+
+
+def buscar_ventana(indice, grupos, fechas, ventana):
+    """Devuelve las posiciones [ini, fin) del índice con el mismo grupo y el instante dentro de ±ventana."""
+    ventana = pd.Timedelta(ventana).to_timedelta64()
+    fechas = np.asarray(fechas).astype('datetime64[ns]')
+    codigos = indice['agencias'].get_indexer(np.asarray(grupos, dtype=object))
+    paso = len(indice['instantes']) + 1
+
+    rango_ini = np.searchsorted(indice['instantes'], fechas - ventana, side='left')
+    rango_fin = np.searchsorted(indice['instantes'], fechas + ventana, side='right')
+    ini = np.searchsorted(indice['claves'], codigos * paso + rango_ini, side='left')
+    fin = np.searchsorted(indice['claves'], codigos * paso + rango_fin, side='left')
+    vacio = (codigos < 0) | np.isnat(fechas)
+    fin[vacio] = ini[vacio]
+    return ini, fin
+
+
+def pares_por_intervalo(grupos_fuente, tiempos_fuente, fuentes, grupos, tiempos, objetivos, margen):
+    """
+    Pares (objetivo, fuente) del mismo grupo con los instantes a menos de margen. Las fuentes se
+    ordenan una vez por (grupo, instante) y cada objetivo busca su ventana con searchsorted.
+    """
+    tiempos_fuente = np.asarray(tiempos_fuente).astype('datetime64[ns]')
+    idx_fuentes = np.flatnonzero(fuentes & ~np.isnat(tiempos_fuente))
+    idx_objetivos = np.flatnonzero(objetivos)
+    if not len(idx_fuentes) or not len(idx_objetivos):
+        return idx_objetivos[:0], idx_fuentes[:0]
+
+    indice = indexar_por_grupo(grupos_fuente[idx_fuentes], tiempos_fuente[idx_fuentes])
+    ini, fin = buscar_ventana(indice, grupos[idx_objetivos], np.asarray(tiempos)[idx_objetivos], margen)
+
+    # Expande cada objetivo a los candidatos de su ventana
+    largos = fin - ini
+    objetivo = np.repeat(idx_objetivos, largos)
+    desplazamiento = np.arange(largos.sum()) - np.repeat(np.cumsum(largos) - largos, largos)
+    fuente = idx_fuentes[indice['orden'][np.repeat(ini, largos) + desplazamiento]]
+    return objetivo, fuente
+
+
+def cumplen(tabla, condiciones, n):
+    """Filas de tabla que cumplen todas las condiciones {columna: valor o lista de valores}."""
+    cumple = np.ones(n, dtype=bool)
+    for columna, valor in condiciones.items():
+        valores = list(valor) if isinstance(valor, (list, tuple, set, frozenset)) else [valor]
+        cumple &= pd.Series(tabla[columna]).isin(valores).to_numpy()
+    return cumple
+
+
+def _instantes(tabla, columna):
+    valores = np.asarray(tabla[columna])
+    return valores.astype('datetime64[ns]') if valores.dtype.kind == 'M' else valores
+
+
+def _tolerancia(valores, tolerancia):
+    return pd.Timedelta(tolerancia).to_timedelta64() if valores.dtype.kind == 'M' else tolerancia
+
+
+def evaluar_reglas(tabla, reglas, grupo='Agencia_base', fuentes=None):
+    """
+    Devuelve, para cada regla, un array booleano con las filas de tabla que son su objetivo y
+    tienen alguna fuente que la cumple. tabla (y fuentes, si las fuentes vienen de otra tabla) es
+    un DataFrame o un dict de columnas. Todas las reglas ven los valores de entrada, así que el
+    resultado no depende de su orden.
+    """
+    propia = fuentes is None
+    fuentes = tabla if propia else fuentes
+    grupos = np.asarray(tabla[grupo], dtype=object)
+    grupos_fuente = grupos if propia else np.asarray(fuentes[grupo], dtype=object)
+    marcados = [np.zeros(len(grupos), dtype=bool) for _ in reglas]
+
+    # Una sola búsqueda por columna de join, compartida por todas las reglas que la usan
+    por_columna = {}
+    for i, regla in enumerate(reglas):
+        por_columna.setdefault(next(iter(regla['cerca'])), []).append(i)
+
+    for columna, indices in por_columna.items():
+        objetivos = [cumplen(tabla, reglas[i]['objetivo'], len(grupos)) for i in indices]
+        disparadores = [cumplen(fuentes, reglas[i].get('fuente', {}), len(grupos_fuente)) for i in indices]
+        tiempos, tiempos_fuente = _instantes(tabla, columna), _instantes(fuentes, columna)
+        margen = max(pd.Timedelta(reglas[i]['cerca'][columna]) for i in indices)
+
+        if len(indices) == 1 and len(reglas[indices[0]]['cerca']) == 1 and not reglas[indices[0]].get('distinto') and not propia:
+            # Basta con saber si la ventana tiene alguna fuente, sin expandir los pares
+            validas = disparadores[0] & ~np.isnat(tiempos_fuente)
+            indice = indexar_por_grupo(grupos_fuente[validas], tiempos_fuente[validas])
+            ini, fin = buscar_ventana(indice, grupos, tiempos, margen)
+            marcados[indices[0]] = objetivos[0] & (fin > ini)
+            continue
+
+        objetivo, fuente = pares_por_intervalo(
+            grupos_fuente, tiempos_fuente, np.logical_or.reduce(disparadores),
+            grupos, tiempos, np.logical_or.reduce(objetivos), margen,
+        )
+        if propia:
+            objetivo, fuente = objetivo[objetivo != fuente], fuente[objetivo != fuente]
+        for i, es_objetivo, dispara in zip(indices, objetivos, disparadores):
+            regla = reglas[i]
+            valido = es_objetivo[objetivo] & dispara[fuente]
+            for columna_cerca, tolerancia in regla['cerca'].items():
+                valores, valores_fuente = _instantes(tabla, columna_cerca), _instantes(fuentes, columna_cerca)
+                valido &= np.abs(valores_fuente[fuente] - valores[objetivo]) <= _tolerancia(valores, tolerancia)
+            for columna_distinta in regla.get('distinto', ()):
+                valido &= np.asarray(fuentes[columna_distinta], dtype=object)[fuente] != np.asarray(tabla[columna_distinta], dtype=object)[objetivo]
+            marcados[i][objetivo[valido]] = True
+    return marcados
+
@@ -0,0 +1,202 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .perfil import medir_etapa
+
+# Dentro del directorio incremental: al reiniciar el estado incremental también se reinicia el resumen
+DIRECTORIO_RESUMEN = "files/incremental/resumen"
+DIMENSIONES = {'Proveedor': 'Resumen Proveedor', 'Agencia_base': 'Resumen Agencia'}
+CLAVE_HISTOGRAMA = ['Fecha', 'Dimension', 'Grupo', 'Estado', 'Tiempo']
+CLAVE_CAIDA = ['Fecha', 'Dimension', 'Grupo']
+COLUMNAS_RESUMEN = [
+    'Incidentes', 'Reboots', 'Caídas', 'Sin recuperar', 'Minutos', 'Minutos reboot', 'Minutos caída',
+    'P50 minutos', 'P95 minutos', 'Enlaces', 'Disponibilidad %',
+]
+
+
+def minutos_por_dia(df):
+    """Minutos caídos de cada incidente recuperado repartidos entre los días que abarca: (fila, día, minutos)."""
+    recuperados = np.flatnonzero(df['Fecha Up'].notna().to_numpy())
+    down = df['Fecha Down'].to_numpy(dtype='datetime64[us]')[recuperados]
+    up = df['Fecha Up'].to_numpy(dtype='datetime64[us]')[recuperados]
+    primer_dia = down.astype('datetime64[D]')
+    dias = np.maximum((up.astype('datetime64[D]') - primer_dia).astype(np.int64) + 1, 1)
+
+    fila = np.repeat(np.arange(len(recuperados)), dias)
+    desplazamiento = np.arange(len(fila)) - np.repeat(np.cumsum(dias) - dias, dias)
+    dia = (primer_dia[fila] + desplazamiento.astype('timedelta64[D]')).astype('datetime64[us]')
+    inicio = np.maximum(down[fila], dia)
+    fin = np.minimum(up[fila], dia + np.timedelta64(1, 'D'))
+    minutos = np.maximum((fin - inicio) / np.timedelta64(1, 'm'), 0)
+    return recuperados[fila], dia, minutos
+
+
+@medir_etapa()
+def agregados_diarios(df):
+    """
+    Agregados diarios de los incidentes (como los deja corregir_estados_reboot) por Proveedor y por
+    Agencia_base, en tres tablas que se pueden sumar entre lotes:
+    - histograma: incidentes por día de Fecha Down, grupo, Estado y Tiempo (los percentiles de
+      cualquier período salen exactos sumando histogramas),
+    - caida: minutos caídos por día calendario y grupo, para la disponibilidad,
+    - enlaces: los enlaces de cada grupo.
+    """
+    fecha = df['Fecha Down'].dt.normalize()
+    fila, dia, minutos = minutos_por_dia(df)
+    histogramas, caidas = [], []
+    for dimension in DIMENSIONES:
+        grupo = df[dimension].astype(object)
+        histograma = pd.DataFrame({
+            'Fecha': fecha, 'Dimension': dimension, 'Grupo': grupo,
+            'Estado': df['Estado'].astype(object), 'Tiempo': df['Tiempo'].astype('Int64'),
+        })
+        # Los incidentes sin Tiempo (sin recuperar) también se cuentan
+        histogramas.append(histograma[grupo.notna().to_numpy()].groupby(CLAVE_HISTOGRAMA, dropna=False).size()
+                           .rename('Incidentes').reset_index())
+        caidas.append(pd.DataFrame({
+            'Fecha': dia, 'Dimension': dimension, 'Grupo': grupo.to_numpy()[fila], 'Minutos': minutos,
+        }).groupby(CLAVE_CAIDA)['Minutos'].sum().reset_index())
+    return {
+        'histograma': pd.concat(histogramas, ignore_index=True),
+        'caida': pd.concat(caidas, ignore_index=True),
+        'enlaces': enlaces_por_grupo(df),
+    }
+
+
+def enlaces_por_grupo(df):
+    """Los enlaces de cada grupo de las dimensiones, sin repetir: (Dimension, Grupo, Enlace)."""
+    enlaces = [
+        pd.DataFrame({'Dimension': dimension, 'Grupo': df[dimension].astype(object), 'Enlace': df['Enlace'].astype(object)})
+        for dimension in DIMENSIONES
+    ]
+    return pd.concat(enlaces, ignore_index=True).dropna().drop_duplicates(ignore_index=True)
+
+
+def _sumar(partes, clave, columna):
+    partes = [parte for parte in partes if parte is not None and len(parte)]
+    if not partes:
+        return None
+    return pd.concat(partes, ignore_index=True).groupby(clave, dropna=False)[columna].sum().reset_index()
+
+
+@medir_etapa()
+def actualizar_resumen(df, directorio=DIRECTORIO_RESUMEN):
+    """
+    Suma los agregados de un lote de incidentes nuevos (p. ej. los cerrados por procesar_lote) a
+    los guardados. Se guarda un archivo por mes, así que cada lote solo reescribe los meses en los
+    que tiene incidentes. Devuelve los meses actualizados.
+    """
+    agregados = agregados_diarios(df)
+    os.makedirs(directorio, exist_ok=True)
+    meses = set()
+    for tabla, clave, columna in (('histograma', CLAVE_HISTOGRAMA, 'Incidentes'), ('caida', CLAVE_CAIDA, 'Minutos')):
+        nuevos = agregados[tabla]
+        for mes, parte in nuevos.groupby(nuevos['Fecha'].dt.strftime('%Y-%m')):
+            ruta = os.path.join(directorio, f'{tabla}_{mes}.parquet')
+            anterior = pd.read_parquet(ruta) if os.path.exists(ruta) else None
+            _sumar([anterior, parte], clave, columna).to_parquet(ruta, index=False)
+            meses.add(mes)
+    ruta_enlaces = os.path.join(directorio, 'enlaces.parquet')
+    anteriores = pd.read_parquet(ruta_enlaces) if os.path.exists(ruta_enlaces) else None
+    pd.concat([anteriores, agregados['enlaces']], ignore_index=True).drop_duplicates(ignore_index=True).to_parquet(ruta_enlaces, index=False)
+    return sorted(meses)
+
+
+def leer_resumen(fecha_inicio, fecha_fin, directorio=DIRECTORIO_RESUMEN):
+    """Agregados guardados de los días entre fecha_inicio y fecha_fin (inclusive); solo se leen los meses del rango."""
+    desde, hasta = pd.Timestamp(fecha_inicio).normalize(), pd.Timestamp(fecha_fin).normalize()
+    meses = pd.period_range(desde, hasta, freq='M').strftime('%Y-%m')
+    agregados = {}
+    for tabla in ('histograma', 'caida'):
+        rutas = [os.path.join(directorio, f'{tabla}_{mes}.parquet') for mes in meses]
+        partes = [pd.read_parquet(ruta) for ruta in rutas if os.path.exists(ruta)]
+        tabla_df = pd.concat(partes, ignore_index=True) if partes else agregados_diarios(_vacio())[tabla]
+        agregados[tabla] = tabla_df[(tabla_df['Fecha'] >= desde) & (tabla_df['Fecha'] <= hasta)]
+    ruta_enlaces = os.path.join(directorio, 'enlaces.parquet')
+    agregados['enlaces'] = pd.read_parquet(ruta_enlaces) if os.path.exists(ruta_enlaces) else agregados_diarios(_vacio())['enlaces']
+    return agregados
+
+
+def _vacio():
+    return pd.DataFrame({
+        'Enlace': pd.Series(dtype=object), 'Fecha Down': pd.Series(dtype='datetime64[us]'),
+        'Fecha Up': pd.Series(dtype='datetime64[us]'), 'Tiempo': pd.Series(dtype='Int64'),
+        'Estado': pd.Series(dtype=object), 'Agencia_base': pd.Series(dtype=object), 'Proveedor': pd.Series(dtype=object),
+    })
+
+
+def percentil_histograma(grupos, valores, conteos, q, n_grupos):
+    """
+    Percentil q (interpolación lineal, como Series.quantile) de cada grupo a partir de pares
+    (valor, conteo), sin expandir los conteos: el elemento k de cada grupo se ubica con
+    searchsorted sobre los conteos acumulados. NaN para los grupos sin valores.
+    """
+    orden = np.lexsort((valores, grupos))
+    grupos, valores, acumulado = grupos[orden], valores[orden], np.cumsum(conteos[orden])
+    totales = np.bincount(grupos, weights=conteos[orden], minlength=n_grupos).astype(np.int64)
+    inicio = np.cumsum(totales) - totales
+    posicion = q * np.maximum(totales - 1, 0)
+    bajo, alto = np.floor(posicion).astype(np.int64), np.ceil(posicion).astype(np.int64)
+    resultado = np.full(n_grupos, np.nan)
+    con_datos = totales > 0
+    valor_bajo = valores[np.searchsorted(acumulado, (inicio + bajo)[con_datos], side='right')]
+    valor_alto = valores[np.searchsorted(acumulado, (inicio + alto)[con_datos], side='right')]
+    resultado[con_datos] = valor_bajo + (valor_alto - valor_bajo) * (posicion - bajo)[con_datos]
+    return resultado
+
+
+def resumen_periodo(agregados, dimension, fecha_inicio, fecha_fin):
+    """
+    Indicadores por grupo de la dimensión ('Proveedor' o 'Agencia_base') en los días entre
+    fecha_inicio y fecha_fin: incidentes por estado, minutos (los de cada incidente se cuentan en el
+    día de su Fecha Down), percentiles 50 y 95 de la duración y disponibilidad de los enlaces del
+    grupo en el período (con los minutos caídos de cada día calendario).
+    """
+    desde, hasta = pd.Timestamp(fecha_inicio).normalize(), pd.Timestamp(fecha_fin).normalize()
+    histograma = agregados['histograma']
+    histograma = histograma[(histograma['Dimension'] == dimension) & histograma['Fecha'].between(desde, hasta)]
+    caida = agregados['caida']
+    caida = caida[(caida['Dimension'] == dimension) & caida['Fecha'].between(desde, hasta)]
+    enlaces = agregados['enlaces']
+    enlaces = enlaces[enlaces['Dimension'] == dimension].groupby('Grupo').size()
+
+    codigos, grupos = pd.factorize(histograma['Grupo'], sort=True)
+    conteo = histograma['Incidentes'].to_numpy(dtype=np.int64)
+    tiempo = histograma['Tiempo'].astype('Float64').to_numpy(dtype=np.float64, na_value=np.nan)
+    recuperado = ~np.isnan(tiempo)
+    minutos = np.where(recuperado, tiempo, 0) * conteo
+    estado = histograma['Estado'].to_numpy(dtype=object)
+    n = len(grupos)
+
+    def por_grupo(valores, filtro=True):
+        return np.bincount(codigos, weights=np.where(filtro, valores, 0), minlength=n)
+
+    resultado = pd.DataFrame({
+        'Incidentes': por_grupo(conteo),
+        'Reboots': por_grupo(conteo, estado == 'Reboot'),
+        'Caídas': por_grupo(conteo, estado == 'Caído y recuperado'),
+        'Sin recuperar': por_grupo(conteo, estado == 'Caído'),
+        'Minutos': por_grupo(minutos),
+        'Minutos reboot': por_grupo(minutos, estado == 'Reboot'),
+        'Minutos caída': por_grupo(minutos, estado == 'Caído y recuperado'),
+        'P50 minutos': percentil_histograma(codigos[recuperado], tiempo[recuperado], conteo[recuperado], 0.5, n),
+        'P95 minutos': percentil_histograma(codigos[recuperado], tiempo[recuperado], conteo[recuperado], 0.95, n),
+    }, index=pd.Index(grupos, name=dimension))
+    for columna in ['Incidentes', 'Reboots', 'Caídas', 'Sin recuperar', 'Minutos', 'Minutos reboot', 'Minutos caída']:
+        resultado[columna] = resultado[columna].round().astype('int64')
+
+    # Disponibilidad sobre los enlaces conocidos del grupo durante todos los minutos del período
+    resultado['Enlaces'] = enlaces.reindex(resultado.index, fill_value=0).to_numpy()
+    minutos_caidos = caida.groupby('Grupo')['Minutos'].sum().reindex(resultado.index, fill_value=0)
+    minutos_periodo = ((hasta - desde).days + 1) * 24 * 60 * resultado['Enlaces']
+    resultado['Disponibilidad %'] = (100 * (1 - minutos_caidos / minutos_periodo.where(minutos_periodo > 0))).round(3)
+    return resultado.reset_index()[[dimension] + COLUMNAS_RESUMEN]
+
+
+def escribir_resumen(escritor, agregados, fecha_inicio, fecha_fin):
+    """Una hoja de resumen por dimensión con el EscritorReporte."""
+    for dimension, hoja in DIMENSIONES.items():
+        escritor.hoja(hoja, resumen_periodo(agregados, dimension, fecha_inicio, fecha_fin))
+
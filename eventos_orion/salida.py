@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .variantes import FORMATOS_SALIDA
+
+FORMATO_FECHA = 'yyyy-mm-dd hh:mm:ss'
+# Excel cuenta los días desde 1899-12-30
+ORIGEN_EXCEL = np.datetime64('1899-12-30', 'us')
+ANCHOS_COLUMNA = {
+    'Enlace': 45, 'Fecha Down': 20, 'Fecha Up': 20, 'Tiempo': 9, 'Estado': 20, 'Agencia_base': 35, 'Proveedor': 13,
+    'Caídas agrupadas': 17,
+}
+ANCHO_POR_DEFECTO = 15
+# Filas de una hoja de Excel, encabezado incluido; xlsxwriter ignora sin avisar las que pasan el límite
+FILAS_EXCEL = 1_048_576
+FILAS_POR_BLOQUE = 50_000
+
+
+def _columna_excel(serie):
+    """
+    Valores de una columna listos para xlsxwriter y el método con el que se escriben. Las fechas
+    pasan a número de serie de Excel de una vez; los nulos quedan como None y no se escriben.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        if getattr(serie.dtype, 'tz', None) is not None:
+            # Excel no guarda zona horaria: se escribe la hora local
+            serie = serie.dt.tz_localize(None)
+        fechas = serie.to_numpy(dtype='datetime64[us]')
+        dias = (fechas - ORIGEN_EXCEL) / np.timedelta64(1, 'D')
+        return [None if nulo else valor for valor, nulo in zip(dias.tolist(), np.isnat(fechas))], 'fecha'
+    if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+        valores = serie.astype('Float64').to_numpy(dtype=object, na_value=None)
+        return valores.tolist(), 'numero'
+    valores = serie.astype(object).where(serie.notna(), None).to_numpy(dtype=object)
+    return [None if valor is None else str(valor) for valor in valores], 'texto'
+
+
+class EscritorReporte:
+    """
+    Escribe las hojas de un reporte a medida que se generan.
+
+    El Excel usa el modo constant_memory de xlsxwriter: cada fila se vuelca al disco al pasar a la
+    siguiente, así que la memoria no crece con el tamaño del reporte, y las celdas se escriben
+    directamente desde las columnas con formatos y anchos fijos. Con 'csv' o 'parquet' en formatos
+    cada hoja se guarda además (o en lugar del Excel) como archivo aparte en una carpeta con el
+    nombre del reporte.
+    """
+
+    def __init__(self, ruta, formatos=('xlsx',)):
+        desconocidos = sorted(set(formatos) - set(FORMATOS_SALIDA))
+        if not formatos or desconocidos:
+            raise ValueError(f"Formatos de salida inválidos: {', '.join(desconocidos) or 'ninguno'} (use {', '.join(FORMATOS_SALIDA)})")
+        self.ruta = ruta
+        self.formatos = tuple(formatos)
+        self.directorio = os.path.splitext(ruta)[0]
+        self.nombres = set()
+        self.libro = None
+        if 'xlsx' in self.formatos:
+            import xlsxwriter
+
+            self.libro = xlsxwriter.Workbook(ruta, {'constant_memory': True})
+            self.formato_encabezado = self.libro.add_format({'bold': True, 'border': 1})
+            self.formato_fecha = self.libro.add_format({'num_format': FORMATO_FECHA})
+        if set(self.formatos) - {'xlsx'}:
+            os.makedirs(self.directorio, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def cerrar(self):
+        if self.libro is not None:
+            self.libro.close()
+            self.libro = None
+
+    def _nombre_unico(self, nombre):
+        # Excel no admite hojas repetidas (p. ej. '01_dia' en rangos de más de un mes)
+        nombre = nombre[:31]
+        base, intento = nombre, 2
+        while nombre.lower() in self.nombres:
+            sufijo = f"_{intento}"
+            nombre = f"{base[:31 - len(sufijo)]}{sufijo}"
+            intento += 1
+        self.nombres.add(nombre.lower())
+        return nombre
+
+    def hoja(self, nombre, df):
+        nombre = self._nombre_unico(nombre)
+        if self.libro is not None:
+            # Lo que no entra en una hoja sigue en 'nombre (2)', 'nombre (3)'...; CSV y Parquet van enteros
+            por_hoja = FILAS_EXCEL - 1
+            for parte, inicio in enumerate(range(0, max(len(df), 1), por_hoja), start=1):
+                sufijo = f" ({parte})"
+                nombre_parte = nombre if parte == 1 else self._nombre_unico(f"{nombre[:31 - len(sufijo)]}{sufijo}")
+                self._hoja_excel(nombre_parte, df.iloc[inicio:inicio + por_hoja])
+        if 'csv' in self.formatos:
+            df.to_csv(os.path.join(self.directorio, f"{nombre}.csv"), index=False)
+        if 'parquet' in self.formatos:
+            df.to_parquet(os.path.join(self.directorio, f"{nombre}.parquet"), index=False)
+
+    def _hoja_excel(self, nombre, df):
+        hoja = self.libro.add_worksheet(nombre)
+        columnas = [str(columna) for columna in df.columns]
+        for indice, columna in enumerate(columnas):
+            hoja.set_column(indice, indice, ANCHOS_COLUMNA.get(columna, ANCHO_POR_DEFECTO))
+        hoja.write_row(0, 0, columnas, self.formato_encabezado)
+
+        escritores = {
+            'fecha': lambda fila, col, valor: hoja.write_number(fila, col, valor, self.formato_fecha),
+            'numero': hoja.write_number,
+            'texto': hoja.write_string,
+        }
+        # constant_memory exige escribir fila por fila, en orden; las columnas se convierten por
+        # bloques para no tener todo el reporte como objetos Python a la vez
+        for inicio in range(0, len(df), FILAS_POR_BLOQUE):
+            bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE]
+            columnas_excel = []
+            for indice in range(len(columnas)):
+                valores, tipo = _columna_excel(bloque.iloc[:, indice])
+                columnas_excel.append((indice, valores, escritores[tipo]))
+            for fila in range(len(bloque)):
+                for indice, valores, escribir in columnas_excel:
+                    valor = valores[fila]
+                    if valor is not None:
+                        escribir(inicio + fila + 1, indice, valor)
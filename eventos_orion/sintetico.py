@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+PROVEEDORES = ['Telconet', 'Puntonet', 'CNT', 'Movistar', 'Cirion', 'Claro', 'Newaccess']
+FRASES_EVENTO = {
+    'Node Down': 'has stopped responding',
+    'Node Up': 'is responding again',
+    'Node Rebooted': 'rebooted',
+}
+
+
+def nombres_enlaces(n_agencias, semilla=0):
+    """Nombres de enlace al estilo de Orion: '<agencia> Principal|Backup <proveedor>'."""
+    rng = np.random.default_rng(semilla)
+    nombres = []
+    for agencia in range(n_agencias):
+        proveedores = rng.choice(PROVEEDORES, size=2, replace=False)
+        nombres.append(f"AG{agencia:04d} Principal {proveedores[0]}")
+        nombres.append(f"AG{agencia:04d} Backup {proveedores[1]}")
+    return nombres
+
+
+def generar_export(n_eventos, n_agencias=1000, semilla=0, inicio='2025-01-01', dias=30):
+    """
+    Eventos sintéticos con el esquema del export de Orion (EventTime en UTC, EventTypeName, Message).
+    Tipos y enlaces al azar con carga pareja: sirve para medir memoria; para incidentes con la forma
+    de los reales usar generar_export_realista. Es determinista para una misma semilla.
+    """
+    rng = np.random.default_rng(semilla)
+    enlaces = np.array(nombres_enlaces(n_agencias, semilla), dtype=object)
+    tipos = np.array(list(FRASES_EVENTO), dtype=object)
+    frases = np.array(list(FRASES_EVENTO.values()), dtype=object)
+
+    enlace = rng.integers(len(enlaces), size=n_eventos)
+    tipo = rng.choice(len(tipos), size=n_eventos, p=[0.45, 0.45, 0.10])
+    segundos = rng.integers(dias * 24 * 3600, size=n_eventos)
+
+    mensajes = enlaces[enlace] + ' ' + frases[tipo]
+    return pd.DataFrame({
+        'EventTime': pd.Timestamp(inicio) + pd.to_timedelta(np.sort(segundos), unit='s'),
+        'EventTypeName': tipos[tipo],
+        'Message': mensajes,
+    })
+
+
+def _eventos(enlaces, tipos, instantes):
+    return pd.DataFrame({'enlace': enlaces, 'tipo': tipos, 'instante': instantes})
+
+
+def generar_export_realista(n_eventos, n_agencias=1000, semilla=0, inicio='2025-01-01', dias=30,
+                            prop_reboot=0.15, prop_backup=0.5, prop_flapping=0.05, prop_sin_up=0.03, prop_ruido=0.02):
+    """
+    Export sintético de Orion con exactamente n_eventos eventos y la forma de los reales:
+
+    - caídas down → up con duraciones de minutos a horas, en enlaces Principal y Backup de cada
+      agencia y con los proveedores de PROVEEDORES,
+    - reboots cerca del up (±90 s) en prop_reboot de las caídas; en prop_backup de esas, el Backup
+      de la agencia cae y vuelve a la vez (lo que corrige corregir_estados_reboot),
+    - enlaces inestables (prop_flapping de los enlaces) con ráfagas de caídas cortas,
+    - downs sin up (prop_sin_up): caídas repetidas o que siguen abiertas al final,
+    - mensajes de otros equipos, sin proveedor (prop_ruido).
+
+    Los eventos salen ordenados por EventTime, en segundos; al recortar a n_eventos el último tramo
+    del periodo queda sin eventos. Es determinista para una misma semilla.
+    """
+    rng = np.random.default_rng(semilla)
+    enlaces = np.array(nombres_enlaces(n_agencias, semilla), dtype=object)
+    n_enlaces = len(enlaces)
+    segundos_periodo = dias * 24 * 3600
+    inestables = rng.random(n_enlaces) < prop_flapping
+
+    # Unos 3 eventos por caída contando ráfagas, reboots y Backups; se genera de más y se recorta a n_eventos
+    n_caidas = int(n_eventos / 3.0 * 1.3) + 10
+    enlace = rng.integers(n_enlaces, size=n_caidas)
+    caida = rng.integers(segundos_periodo, size=n_caidas)
+    duracion = np.clip(rng.lognormal(np.log(20 * 60), 1.2, size=n_caidas), 60, 12 * 3600).astype(np.int64)
+    sin_up = rng.random(n_caidas) < prop_sin_up
+    flapping = inestables[enlace] & ~sin_up
+    # En las ráfagas la primera caída dura poco y le siguen otras cortas
+    duracion[flapping] = rng.integers(10, 120, size=flapping.sum())
+    partes = [
+        _eventos(enlace, 'Node Down', caida),
+        _eventos(enlace[~sin_up], 'Node Up', (caida + duracion)[~sin_up]),
+    ]
+
+    rafagas = np.flatnonzero(flapping)
+    repeticiones = rng.integers(2, 8, size=len(rafagas))
+    if len(rafagas):
+        enlace_rafaga = np.repeat(enlace[rafagas], repeticiones)
+        paso = rng.integers(30, 180, size=repeticiones.sum())
+        # Desplazamiento acumulado dentro de cada ráfaga
+        acumulado = np.cumsum(paso)
+        primero = np.cumsum(repeticiones) - repeticiones
+        desplazamiento = acumulado - np.repeat(acumulado[primero] - paso[primero], repeticiones)
+        down_rafaga = np.repeat((caida + duracion)[rafagas], repeticiones) + desplazamiento
+        up_rafaga = down_rafaga + rng.integers(10, 90, size=len(down_rafaga))
+        partes += [_eventos(enlace_rafaga, 'Node Down', down_rafaga), _eventos(enlace_rafaga, 'Node Up', up_rafaga)]
+
+    # Reboots cerca del up y, a veces, el Backup de la misma agencia cayendo a la vez
+    con_reboot = np.flatnonzero(~sin_up & ~flapping & (rng.random(n_caidas) < prop_reboot))
+    up_reboot = caida[con_reboot] + duracion[con_reboot]
+    partes.append(_eventos(enlace[con_reboot], 'Node Rebooted', up_reboot + rng.integers(-90, 91, size=len(con_reboot))))
+    # nombres_enlaces deja cada Principal en posición par y su Backup justo después
+    principales = con_reboot[(enlace[con_reboot] % 2 == 0) & (rng.random(len(con_reboot)) < prop_backup)]
+    backup = enlace[principales] + 1
+    partes += [
+        _eventos(backup, 'Node Down', caida[principales] + rng.integers(-60, 61, size=len(principales))),
+        _eventos(backup, 'Node Up', caida[principales] + duracion[principales] + rng.integers(-60, 61, size=len(principales))),
+    ]
+
+    eventos = pd.concat(partes, ignore_index=True)
+    eventos = eventos[(eventos['instante'] >= 0) & (eventos['instante'] < segundos_periodo)]
+    eventos = eventos.sort_values('instante', kind='mergesort').head(n_eventos)
+    frases = eventos['tipo'].map(FRASES_EVENTO).to_numpy(dtype=object)
+    mensajes = enlaces[eventos['enlace'].to_numpy()] + ' ' + frases
+
+    # Equipos que no son enlaces de un proveedor conocido: el preprocesamiento los descarta
+    ruido = rng.random(len(eventos)) < prop_ruido
+    equipos = np.array([f"SRV{numero:03d} " for numero in rng.integers(1000, size=ruido.sum())], dtype=object)
+    mensajes[ruido] = equipos + frases[ruido]
+
+    return pd.DataFrame({
+        'EventTime': pd.Timestamp(inicio) + pd.to_timedelta(eventos['instante'].to_numpy(), unit='s'),
+        'EventTypeName': eventos['tipo'].to_numpy(dtype=object),
+        'Message': mensajes,
+    })
@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+
+from .incremental import avanzar, cerrar_estado, nuevo_estado, tabla_incidentes
+from .ingesta import COLUMNAS_EVENTOS, TIPOS_EVENTOS, columnar_vigente, convertir_a_columnar, ruta_columnar
+from .perfil import medir_etapa
+from .procesamiento import COLUMNAS_INCIDENTES
+
+FILAS_POR_BLOQUE = 500_000
+# La salida guarda el ordinal del evento de origen para poder reconstruir el orden del procesamiento completo
+COLUMNAS_SALIDA = COLUMNAS_INCIDENTES + ['Orden']
+
+
+def leer_por_bloques(ruta_parquet, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Recorre los eventos de un Parquet de a filas_por_bloque filas, con el texto como categorías."""
+    import pyarrow.parquet as pq
+
+    columnas_categoricas = [columna for columna, tipo in TIPOS_EVENTOS.items() if tipo == 'category']
+    archivo = pq.ParquetFile(ruta_parquet, read_dictionary=columnas_categoricas)
+    for lote in archivo.iter_batches(batch_size=filas_por_bloque, columns=COLUMNAS_EVENTOS):
+        yield lote.to_pandas().astype(TIPOS_EVENTOS)
+
+
+def _esquema_salida():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('Enlace', pa.string()),
+        ('Fecha Down', pa.timestamp('us')),
+        ('Fecha Up', pa.timestamp('us')),
+        ('Tiempo', pa.int64()),
+        ('Estado', pa.string()),
+        ('Agencia_base', pa.string()),
+        ('Proveedor', pa.string()),
+        ('Orden', pa.int64()),
+    ])
+
+
+def _escribir(escritor, incidentes):
+    import pyarrow as pa
+
+    if incidentes is None or not len(incidentes):
+        return 0
+    tabla = incidentes[COLUMNAS_SALIDA].astype({
+        'Enlace': str, 'Estado': str, 'Agencia_base': str, 'Proveedor': str, 'Tiempo': 'Int64',
+        'Fecha Down': 'datetime64[us]', 'Fecha Up': 'datetime64[us]',
+    })
+    escritor.write_table(pa.Table.from_pandas(tabla, schema=escritor.schema, preserve_index=False))
+    return len(incidentes)
+
+
+@medir_etapa()
+def procesar_por_bloques(ruta_entrada, ruta_salida, preparar, filas_por_bloque=FILAS_POR_BLOQUE,
+                         caidas_repetidas=False, ventana_reboot='2min', margen_reboot='2min'):
+    """
+    Procesa un export que no cabe en memoria leyendo bloques ordenados por EventTime. Cada bloque se
+    prepara con preparar (ajuste de hora y campos del mensaje) y se avanza sobre el estado de
+    incremental.py, que arrastra las caídas abiertas y los reboots del borde al siguiente bloque; los
+    incidentes que ya no pueden cambiar se escriben en ruta_salida (Parquet) a medida que se cierran.
+    La memoria depende del tamaño del bloque y del número de agencias, no de los meses del archivo.
+
+    Un Excel se convierte antes a Parquet con ingesta.convertir_a_columnar (que lo deja ordenado).
+    Devuelve el número de incidentes escritos.
+    """
+    import pyarrow.parquet as pq
+
+    if not ruta_entrada.endswith('.parquet'):
+        if not columnar_vigente(ruta_entrada):
+            convertir_a_columnar(ruta_entrada)
+        ruta_entrada = ruta_columnar(ruta_entrada)
+
+    estado = nuevo_estado(caidas_repetidas, ventana_reboot, margen_reboot)
+    directorio = os.path.dirname(ruta_salida)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+
+    escritos = 0
+    with pq.ParquetWriter(ruta_salida, _esquema_salida(), compression='zstd') as escritor:
+        for bloque in leer_por_bloques(ruta_entrada, filas_por_bloque):
+            eventos = preparar(bloque)
+            if estado['marca'] is not None and (eventos['EventTime'] < pd.Timestamp(estado['marca'])).any():
+                raise ValueError(
+                    f"{ruta_entrada} no está ordenado por EventTime; conviértalo con ingesta.py antes de procesarlo por bloques"
+                )
+            # Los bloques no se solapan: no hay eventos repetidos que descartar
+            estado, cerrados = avanzar(estado, eventos, descartar_repetidos=False)
+            escritos += _escribir(escritor, cerrados)
+        escritos += _escribir(escritor, cerrar_estado(estado))
+    return escritos
+
+
+def leer_resultado(ruta_salida):
+    """Incidentes escritos por procesar_por_bloques, en el orden y con los tipos del procesamiento completo."""
+    return tabla_incidentes([pd.read_parquet(ruta_salida)])
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# Ventanas de cada turno: empiezan en 'inicio' del día del turno y duran 'duracion' (hasta 24 h, pueden
+# cruzar la medianoche). 'dias_semana' limita el turno a esos días (lunes=0) y 'hoja' es el nombre
+# de la hoja, con {dia} y {dia_siguiente} como el día del mes del turno y del día siguiente.
+TURNOS = {
+    'dia': {'inicio': '8h', 'duracion': '12h', 'hoja': '{dia}_dia'},
+    'madrugada': {'inicio': '20h', 'duracion': '12h', 'hoja': '{dia}-{dia_siguiente}_Madrugada'},
+    'sabado_matutino': {'inicio': '8h', 'duracion': '12h', 'dias_semana': [5], 'hoja': '{dia}_Sabado_Matutino'},
+    'domingo_matutino': {'inicio': '8h', 'duracion': '12h', 'dias_semana': [6], 'hoja': '{dia}_Domingo_Matutino'},
+}
+
+
+def seleccionar_turnos(*nombres, turnos=TURNOS):
+    return {nombre: turnos[nombre] for nombre in nombres}
+
+
+def fechas_rango(fecha_inicio, fecha_fin):
+    """Todos los días entre fecha_inicio y fecha_fin (inclusive), a medianoche."""
+    return pd.date_range(pd.Timestamp(fecha_inicio).normalize(), pd.Timestamp(fecha_fin).normalize(), freq='D')
+
+
+def rango_turnos(fecha_inicio, fecha_fin, turnos=TURNOS):
+    """[desde, hasta) que cubre todos los turnos de los días entre fecha_inicio y fecha_fin."""
+    fechas = fechas_rango(fecha_inicio, fecha_fin)
+    inicios = [pd.Timedelta(turno['inicio']) for turno in turnos.values()]
+    fines = [pd.Timedelta(turno['inicio']) + pd.Timedelta(turno['duracion']) for turno in turnos.values()]
+    return fechas[0] + min(inicios), fechas[-1] + max(fines)
+
+
+def fechas_con_caidas(df, fecha_inicio, fecha_fin):
+    """Días del rango en los que hay al menos una Fecha Down, ordenados."""
+    dias = df['Fecha Down'].dropna().dt.normalize()
+    dias = dias[(dias >= pd.Timestamp(fecha_inicio).normalize()) & (dias <= pd.Timestamp(fecha_fin).normalize())]
+    return pd.DatetimeIndex(np.sort(dias.unique()))
+
+
+def asignar_turnos(df, turnos, fechas, incluir_up=False):
+    """
+    Etiqueta los incidentes con los turnos en los que caen, en una pasada vectorizada por turno.
+
+    Un incidente pertenece al turno del día d si su Fecha Down (o, con incluir_up, su Fecha Up) está
+    en [d + inicio, d + inicio + duracion); el día se obtiene restando el inicio y truncando al día.
+    Solo se consideran los días de fechas. Devuelve un DataFrame con Fecha, Turno y Fila (posición
+    en df) ordenado por día, por el orden de turnos y por fila, sin repetidos.
+    """
+    fechas = pd.DatetimeIndex(fechas).normalize()
+    columnas = ['Fecha Down', 'Fecha Up'] if incluir_up else ['Fecha Down']
+    filas = np.arange(len(df))
+    partes = []
+    for orden, (nombre, turno) in enumerate(turnos.items()):
+        inicio = pd.Timedelta(turno['inicio'])
+        duracion = pd.Timedelta(turno['duracion'])
+        if duracion > pd.Timedelta(days=1):
+            raise ValueError(f"El turno {nombre} dura más de un día")
+        for columna in columnas:
+            desplazado = df[columna] - inicio
+            fecha = desplazado.dt.floor('D')
+            dentro = ((desplazado - fecha) < duracion) & fecha.isin(fechas)
+            if 'dias_semana' in turno:
+                dentro &= fecha.dt.weekday.isin(turno['dias_semana'])
+            dentro = dentro.to_numpy(dtype=bool)
+            partes.append(pd.DataFrame({'Fecha': fecha.to_numpy()[dentro], 'Orden': orden, 'Turno': nombre, 'Fila': filas[dentro]}))
+
+    etiquetas = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=['Fecha', 'Orden', 'Turno', 'Fila'])
+    etiquetas = etiquetas.drop_duplicates(['Fecha', 'Orden', 'Fila'])
+    etiquetas = etiquetas.sort_values(['Fecha', 'Orden', 'Fila'], kind='mergesort', ignore_index=True)
+    return etiquetas.drop(columns='Orden')
+
+
+def nombre_hoja(turno, fecha):
+    siguiente = fecha + pd.Timedelta(days=1)
+    return turno['hoja'].format(dia=fecha.strftime('%d'), dia_siguiente=siguiente.strftime('%d'))[:31]
+
+
+def escribir_hojas_turnos(df, escritor, etiquetas, turnos, ordenar_por=None):
+    """Escribe con el EscritorReporte una hoja por cada (día, turno) con incidentes, en el orden de las etiquetas."""
+    for (fecha, nombre), grupo in etiquetas.groupby(['Fecha', 'Turno'], sort=False):
+        registros = df.iloc[grupo['Fila'].to_numpy()]
+        if ordenar_por is not None:
+            registros = registros.sort_values(by=ordenar_por)
+        escritor.hoja(nombre_hoja(turnos[nombre], fecha), registros)
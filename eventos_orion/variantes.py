@@ -0,0 +1,52 @@
+# Reglas y archivos de cada variante. Sin pandas: la CLI y el modo en vivo las leen sin cargar
+# el resto del paquete.
+ARCHIVO_ENTRADA = "files/Report_Testing_orion_ggcas.xlsx"
+PROVEEDORES_VALIDOS = ['telconet', 'puntonet', 'cnt', 'movistar', 'cirion', 'claro', 'newaccess']
+VENTANA_REBOOT = '2min'
+MARGEN_REBOOT = '2min'
+# EventTime viene en UTC; los reportes usan la hora local de esta zona, redondeada al minuto
+ZONA_HORARIA = 'America/Guayaquil'
+REDONDEAR_MINUTO = True
+# Formato del EventTime cuando llega como texto: 'ISO8601' o un patrón de strftime ('%d/%m/%Y %H:%M:%S')
+FORMATO_EVENTTIME = 'ISO8601'
+# Formatos que escribe salida.EscritorReporte
+FORMATOS_SALIDA = ('xlsx', 'csv', 'parquet')
+# Agregar 'csv' o 'parquet' para guardar además cada hoja como archivo aparte
+FORMATOS_REPORTE = ('xlsx',)
+# Un enlace que cae al menos 'caidas' veces dentro de 'ventana' está en flapping: en las hojas de
+# los reportes esas caídas se juntan en un incidente 'Flapping' (None para dejarlas sueltas)
+FLAPPING = {'ventana': '30min', 'caidas': 5}
+NOMBRES_REPORTE = {'dia': 'Dia', 'madrugada': 'Madrugada', 'standby': 'Madrugada_Standby'}
+
+# Hojas de cada tipo de reporte: los turnos (de turnos.TURNOS) y de qué días ('con_caidas': solo
+# los días con alguna Fecha Down; 'rango': todos los del rango), si un incidente entra también por
+# su Fecha Up y cómo se ordenan las filas de cada hoja (sin 'ordenar_por', en el orden del análisis).
+# 'archivo_salida' admite {inicio}, {fin} y {nombre} (el de NOMBRES_REPORTE).
+VARIANTES = {
+    'main': {
+        # Un down repetido sin up intermedio se ignora
+        'caidas_repetidas': False,
+        'archivo_salida': "files/Reporte_Incidentes_Enlaces.xlsx",
+        'archivo_bloques': "files/Incidentes_por_bloques.parquet",
+        'archivo_almacen': "files/incidentes.sqlite",
+        'reportes': {
+            'madrugada': {'turnos': ['madrugada'], 'fechas': 'con_caidas', 'incluir_up': True},
+            'dia': {'turnos': ['dia'], 'fechas': 'rango'},
+            'standby': {
+                'turnos': ['madrugada', 'sabado_matutino', 'domingo_matutino'], 'fechas': 'con_caidas', 'incluir_up': True,
+            },
+        },
+    },
+    'app': {
+        # Cada down repetido sin up intermedio se registra como 'Caído'
+        'caidas_repetidas': True,
+        'archivo_salida': "files/{inicio:%Y%m%d}_{fin:%Y%m%d}_{nombre}.xlsx",
+        'archivo_bloques': "files/Eventos_por_bloques.parquet",
+        'archivo_almacen': "files/incidentes_app.sqlite",
+        'reportes': {
+            'madrugada': {'turnos': ['madrugada'], 'fechas': 'rango', 'ordenar_por': 'Fecha Down'},
+            'dia': {'turnos': ['dia'], 'fechas': 'rango', 'ordenar_por': 'Fecha Down'},
+            # El standby sigue en mantenimiento
+        },
+    },
+}
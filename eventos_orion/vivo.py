@@ -0,0 +1,366 @@
+import asyncio
+import csv
+import heapq
+import json
+import os
+import re
+import signal
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from .mensajes import COLUMNAS_INCIDENTES, campos_mensaje
+from .variantes import FORMATO_EVENTTIME, REDONDEAR_MINUTO, ZONA_HORARIA
+
+# Cada cuánto se vuelve a mirar un archivo que no tiene líneas nuevas
+INTERVALO_LECTURA = 0.2
+# Cada cuánto se reescribe el JSON de caídas abiertas
+INTERVALO_ESTADO = 5.0
+# Eventos seguidos que se procesan antes de ceder el turno al resto de tareas
+EVENTOS_POR_TURNO = 1000
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+SEGUNDOS_POR_UNIDAD = {'s': 1, 'min': 60, 'h': 3600}
+
+
+@lru_cache(maxsize=256)
+def clasificar_tipo(tipo):
+    """(down, up, reboot) de un EventTypeName, con las reglas de clasificar_eventos."""
+    evento = str(tipo).lower()
+    es_down = 'down' in evento
+    return es_down, 'up' in evento and not es_down, 'reboot' in evento
+
+
+def leer_duracion(valor):
+    """timedelta de un texto como los de pd.Timedelta ('90s', '2min', '1h') sin cargar pandas."""
+    if isinstance(valor, timedelta):
+        return valor
+    partes = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(s|min|h)\s*', str(valor))
+    if partes is None:
+        raise ValueError(f"Duración no reconocida: {valor!r} (use s, min o h)")
+    return timedelta(seconds=float(partes.group(1)) * SEGUNDOS_POR_UNIDAD[partes.group(2)])
+
+
+def leer_instante(valor, zona, formato=FORMATO_EVENTTIME):
+    """
+    EventTime de un evento en la hora local de zona, sin zona horaria como en ajustar_horas, o None
+    si no se puede leer. El texto se lee con el formato de leer_fechas ('ISO8601' o un patrón de
+    strftime) y un EventTime sin zona se toma como UTC, igual que en el reporte.
+    """
+    if not isinstance(valor, datetime):
+        texto = str(valor).strip()
+        try:
+            valor = datetime.fromisoformat(texto) if formato == 'ISO8601' else datetime.strptime(texto, formato)
+        except ValueError:
+            return None
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return valor.astimezone(zona).replace(tzinfo=None)
+
+
+class MaquinaIncidentes:
+    """
+    Versión en línea de analizar_incidentes: recibe los eventos de uno en uno, en orden de
+    EventTime, y devuelve cada incidente en cuanto queda decidido.
+
+    Por enlace se guarda solo la caída abierta, el último proveedor visto y los reboots de la
+    última ventana_reboot; los reboots más viejos se descartan al avanzar el reloj, así que la
+    memoria depende de la cantidad de enlaces y no de la de eventos. Un par down/up se emite como
+    'Reboot' si ya hubo un reboot del enlace dentro de la ventana; si no, espera hasta que llegue
+    uno o el reloj pase Fecha Up + ventana_reboot. La propagación entre enlaces de
+    corregir_estados_reboot no se aplica aquí: sigue siendo parte del reporte.
+    """
+
+    def __init__(self, proveedores, caidas_repetidas=False, ventana_reboot='2min', zona_horaria=ZONA_HORARIA,
+                 redondear_minuto=REDONDEAR_MINUTO, formato_eventtime=FORMATO_EVENTTIME):
+        self.proveedores = tuple(proveedores)
+        self.caidas_repetidas = caidas_repetidas
+        self.ventana = leer_duracion(ventana_reboot)
+        self.zona = ZoneInfo(zona_horaria)
+        self.redondear_minuto = redondear_minuto
+        self.formato = formato_eventtime
+        # Eventos de un enlace descartados porque su EventTime no se pudo leer
+        self.sin_fecha = 0
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.marca = None
+        self.abiertas = {}
+        self.ultimo_proveedor = {}
+        # Reboots recientes por enlace y todos juntos en orden de llegada, para descartarlos
+        self.reboots = {}
+        self.historial = deque()
+        # Pares down/up que esperan un posible reboot, por enlace y por vencimiento
+        self.pendientes = {}
+        self.vencimientos = []
+        self.secuencia = 0
+
+    def procesar(self, evento):
+        """Procesa un evento (EventTime, EventTypeName, Message) y devuelve los incidentes que cierra."""
+        proveedor, enlace = campos_mensaje(evento.get('Message'), self.proveedores)
+        if proveedor is None:
+            return []
+        self.ultimo_proveedor[enlace] = proveedor
+        instante = leer_instante(evento.get('EventTime'), self.zona, self.formato)
+        if instante is None:
+            self.sin_fecha += 1
+            return []
+        if self.redondear_minuto:
+            instante = instante.replace(second=0, microsecond=0)
+
+        cerrados = self._avanzar(instante)
+        es_down, es_up, es_reboot = clasificar_tipo(evento.get('EventTypeName'))
+        if es_reboot:
+            self._registrar_reboot(enlace, instante, cerrados)
+        if es_down:
+            abierta = self.abiertas.get(enlace)
+            if abierta is None:
+                self.abiertas[enlace] = instante
+            elif self.caidas_repetidas:
+                cerrados.append(self._incidente(enlace, abierta, None, 'Caído', proveedor))
+                self.abiertas[enlace] = instante
+        elif es_up and enlace in self.abiertas:
+            incidente = self._incidente(enlace, self.abiertas.pop(enlace), instante, 'Caído y recuperado', proveedor)
+            if self._hay_reboot(enlace, instante):
+                incidente['Estado'] = 'Reboot'
+                cerrados.append(incidente)
+            else:
+                self.pendientes.setdefault(enlace, []).append(incidente)
+                heapq.heappush(self.vencimientos, (instante + self.ventana, self.secuencia, incidente))
+                self.secuencia += 1
+        return cerrados
+
+    def cerrar(self, caidas_abiertas=True):
+        """
+        Emite los pares que esperaban un reboot y, con caidas_abiertas, las caídas sin up como
+        'Caído' (como al final del reporte). Deja la máquina vacía.
+        """
+        cerrados = [incidente for _, _, incidente in self.vencimientos if incidente['Estado'] is not None]
+        if caidas_abiertas:
+            cerrados += [
+                self._incidente(enlace, fecha_down, None, 'Caído', self.ultimo_proveedor[enlace])
+                for enlace, fecha_down in self.abiertas.items()
+            ]
+        self.reiniciar()
+        return cerrados
+
+    def caidas_abiertas(self):
+        """Las caídas abiertas en este momento, de la más antigua a la más reciente."""
+        return [
+            {'Enlace': enlace, 'Fecha Down': fecha_down, 'Proveedor': self.ultimo_proveedor[enlace]}
+            for enlace, fecha_down in sorted(self.abiertas.items(), key=lambda par: par[1])
+        ]
+
+    def _incidente(self, enlace, fecha_down, fecha_up, estado, proveedor):
+        tiempo = None if fecha_up is None else round((fecha_up - fecha_down).total_seconds() / 60)
+        return dict(zip(COLUMNAS_INCIDENTES, (enlace, fecha_down, fecha_up, tiempo, estado, enlace, proveedor)))
+
+    def _avanzar(self, instante):
+        """Mueve el reloj, descarta los reboots fuera de la ventana y emite los pares vencidos."""
+        if self.marca is not None and instante <= self.marca:
+            return []
+        self.marca = instante
+        limite = instante - self.ventana
+        while self.historial and self.historial[0][0] < limite:
+            _, enlace = self.historial.popleft()
+            recientes = self.reboots[enlace]
+            recientes.popleft()
+            if not recientes:
+                del self.reboots[enlace]
+
+        cerrados = []
+        while self.vencimientos and self.vencimientos[0][0] < instante:
+            _, _, incidente = heapq.heappop(self.vencimientos)
+            if incidente['Estado'] is None:
+                continue  # ya salió como 'Reboot'
+            cerrados.append(incidente)
+            self._quitar_pendiente(incidente)
+        return cerrados
+
+    def _registrar_reboot(self, enlace, instante, cerrados):
+        self.reboots.setdefault(enlace, deque()).append(instante)
+        self.historial.append((instante, enlace))
+        for incidente in list(self.pendientes.get(enlace, ())):
+            if abs(incidente['Fecha Up'] - instante) <= self.ventana:
+                incidente['Estado'] = 'Reboot'
+                cerrados.append(dict(incidente))
+                # La copia se emite; el original queda marcado para ignorarlo en vencimientos
+                incidente['Estado'] = None
+                self._quitar_pendiente(incidente)
+
+    def _quitar_pendiente(self, incidente):
+        pendientes = [otro for otro in self.pendientes[incidente['Enlace']] if otro is not incidente]
+        self.pendientes[incidente['Enlace']] = pendientes
+        if not pendientes:
+            del self.pendientes[incidente['Enlace']]
+
+    def _hay_reboot(self, enlace, fecha_up):
+        return any(abs(fecha_up - reboot) <= self.ventana for reboot in self.reboots.get(enlace, ()))
+
+
+def leer_linea(linea, encabezado=None):
+    """Evento de una línea JSON o, con encabezado, CSV; None si la línea no es un evento."""
+    linea = linea.strip()
+    if not linea:
+        return None
+    if encabezado is not None:
+        return dict(zip(encabezado, next(csv.reader([linea]))))
+    try:
+        evento = json.loads(linea)
+    except json.JSONDecodeError:
+        return None
+    return evento if isinstance(evento, dict) else None
+
+
+async def seguir_archivo(ruta, desde_inicio=False, hasta_fin=False, intervalo=INTERVALO_LECTURA):
+    """
+    Eventos de un archivo JSON por líneas (o CSV con encabezado, si termina en .csv) a medida que
+    se escribe, como tail -F: empieza por el final salvo desde_inicio y vuelve a abrirlo si se
+    rota o se trunca. Con hasta_fin termina al llegar al final.
+    """
+    es_csv = ruta.lower().endswith('.csv')
+    archivo, saltar, resto, leidas = None, not desde_inicio, '', 0
+    try:
+        while True:
+            if archivo is None:
+                archivo = open(ruta, encoding='utf-8', newline='')
+                inodo, encabezado = os.fstat(archivo.fileno()).st_ino, None
+                if saltar and not es_csv:
+                    archivo.seek(0, os.SEEK_END)
+                    saltar = False
+
+            linea = archivo.readline()
+            if linea:
+                resto += linea
+                if not resto.endswith('\n'):
+                    continue
+                linea, resto = resto, ''
+                if es_csv and encabezado is None:
+                    encabezado = next(csv.reader([linea.strip()]))
+                    if saltar:
+                        archivo.seek(0, os.SEEK_END)
+                        saltar = False
+                    continue
+                evento = leer_linea(linea, encabezado)
+                if evento is not None:
+                    yield evento
+                leidas += 1
+                if leidas % EVENTOS_POR_TURNO == 0:
+                    await asyncio.sleep(0)
+                continue
+
+            if hasta_fin:
+                evento = leer_linea(resto, encabezado) if resto and (encabezado or not es_csv) else None
+                if evento is not None:
+                    yield evento
+                return
+            await asyncio.sleep(intervalo)
+            try:
+                datos = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            if datos.st_ino != inodo or datos.st_size < archivo.tell():
+                # Archivo rotado o truncado: el nuevo se lee desde el principio
+                archivo.close()
+                archivo, resto = None, ''
+    finally:
+        if archivo is not None:
+            archivo.close()
+
+
+async def escuchar_socket(direccion):
+    """Eventos JSON por líneas recibidos en host:puerto o en la ruta de un socket Unix."""
+    cola = asyncio.Queue(maxsize=10 * EVENTOS_POR_TURNO)
+
+    async def atender(lector, escritor):
+        try:
+            while linea := await lector.readline():
+                evento = leer_linea(linea.decode('utf-8', errors='replace'))
+                if evento is not None:
+                    await cola.put(evento)
+        finally:
+            escritor.close()
+
+    if ':' in direccion:
+        host, puerto = direccion.rsplit(':', 1)
+        servidor = await asyncio.start_server(atender, host or '127.0.0.1', int(puerto))
+    else:
+        servidor = await asyncio.start_unix_server(atender, path=direccion)
+    async with servidor:
+        while True:
+            yield await cola.get()
+
+
+def a_json(incidente):
+    return json.dumps({
+        columna: valor.strftime(FORMATO_FECHA) if isinstance(valor, datetime) else valor
+        for columna, valor in incidente.items()
+    }, ensure_ascii=False)
+
+
+def guardar_caidas_abiertas(maquina, ruta):
+    """Escribe las caídas abiertas en ruta de forma atómica, para que otro proceso la lea en cualquier momento."""
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump([json.loads(a_json(caida)) for caida in maquina.caidas_abiertas()], archivo, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+async def _guardar_periodicamente(maquina, ruta, intervalo):
+    while True:
+        await asyncio.sleep(intervalo)
+        guardar_caidas_abiertas(maquina, ruta)
+
+
+async def _consumir(fuente, maquina, salida, medidas):
+    async for evento in fuente:
+        inicio = time.perf_counter()
+        cerrados = maquina.procesar(evento)
+        segundos = time.perf_counter() - inicio
+        medidas['eventos'] += 1
+        medidas['tiempo_s'] += segundos
+        medidas['maximo_s'] = max(medidas['maximo_s'], segundos)
+        if cerrados:
+            medidas['incidentes'] += len(cerrados)
+            salida.write(''.join(a_json(incidente) + '\n' for incidente in cerrados))
+            salida.flush()
+
+
+async def ejecutar(fuente, maquina, salida=sys.stdout, ruta_estado=None, intervalo_estado=INTERVALO_ESTADO,
+                   caidas_al_final=False):
+    """
+    Procesa los eventos de fuente hasta que se agote o llegue SIGINT/SIGTERM y escribe cada
+    incidente en salida como una línea JSON apenas se cierra. Al terminar emite los pares que
+    esperaban un reboot y, con caidas_al_final, las caídas abiertas como 'Caído'.
+    """
+    medidas = {'eventos': 0, 'incidentes': 0, 'tiempo_s': 0.0, 'maximo_s': 0.0}
+    bucle = asyncio.get_running_loop()
+    detener = asyncio.Event()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            bucle.add_signal_handler(senal, detener.set)
+        except (NotImplementedError, RuntimeError):  # Windows o fuera del hilo principal
+            pass
+
+    consumo = asyncio.create_task(_consumir(fuente, maquina, salida, medidas))
+    tareas = [asyncio.create_task(detener.wait())]
+    if ruta_estado:
+        tareas.append(asyncio.create_task(_guardar_periodicamente(maquina, ruta_estado, intervalo_estado)))
+    try:
+        await asyncio.wait([consumo, tareas[0]], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for tarea in [consumo, *tareas]:
+            tarea.cancel()
+        await asyncio.gather(consumo, *tareas, return_exceptions=True)
+    if consumo.done() and not consumo.cancelled() and consumo.exception() is not None:
+        raise consumo.exception()
+
+    if ruta_estado:
+        guardar_caidas_abiertas(maquina, ruta_estado)
+    cerrados = maquina.cerrar(caidas_abiertas=caidas_al_final)
+    medidas['incidentes'] += len(cerrados)
+    salida.write(''.join(a_json(incidente) + '\n' for incidente in cerrados))
+    salida.flush()
+    return medidas
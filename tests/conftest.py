@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Los tests importan el paquete desde la raíz del repositorio, sin instalarlo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eventos_orion.sintetico import generar_export_realista  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def export_realista(tmp_path_factory):
+    """Export sintético pequeño en Parquet: 3 días de enero de 2025, con reboots, Backups y flapping."""
+    ruta = tmp_path_factory.mktemp('exports') / 'orion.parquet'
+    generar_export_realista(6000, n_agencias=60, dias=3, prop_flapping=0.2).to_parquet(ruta, index=False)
+    return ruta
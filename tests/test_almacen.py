@@ -0,0 +1,55 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from eventos_orion.almacen import abrir_almacen, guardar_incidentes
+from eventos_orion.pipeline import Pipeline
+from eventos_orion.variantes import VARIANTES
+
+# Los 3 días del export sintético, en hora local: todos los incidentes caen en algún turno
+FECHA_INICIO, FECHA_FIN = pd.Timestamp('2024-12-31'), pd.Timestamp('2025-01-03')
+
+
+def filas_guardadas(ruta):
+    with sqlite3.connect(ruta) as conexion:
+        return conexion.execute('SELECT COUNT(*) FROM incidentes').fetchone()[0]
+
+
+@pytest.mark.parametrize('variante', list(VARIANTES))
+def test_reporte_del_almacen_igual_que_del_export(export_realista, tmp_path, monkeypatch, variante):
+    monkeypatch.chdir(tmp_path)
+    pipeline = Pipeline(variante)
+    ruta_almacen = str(tmp_path / 'incidentes.sqlite')
+    guardados = pipeline.guardar_en_almacen(export_realista, ruta_almacen)
+    # Volver a cargar el mismo export actualiza las filas en lugar de duplicarlas
+    assert pipeline.guardar_en_almacen(export_realista, ruta_almacen) == guardados
+    assert filas_guardadas(ruta_almacen) == guardados == len(pipeline.procesar(export_realista))
+
+    for tipo in pipeline.reportes:
+        del_export = pipeline.reportar(pipeline.procesar(export_realista), tipo, FECHA_INICIO, FECHA_FIN, str(tmp_path / f'{tipo}_export.xlsx'))
+        del_almacen = pipeline.reportar(
+            pipeline.consultar(FECHA_INICIO, FECHA_FIN, ruta_almacen), tipo, FECHA_INICIO, FECHA_FIN,
+            str(tmp_path / f'{tipo}_almacen.xlsx'), pipeline.consultar_resumen(FECHA_INICIO, FECHA_FIN, ruta_almacen),
+        )
+        esperadas, leidas = pd.read_excel(del_export, sheet_name=None), pd.read_excel(del_almacen, sheet_name=None)
+        assert list(leidas) == list(esperadas)
+        for nombre, hoja in esperadas.items():
+            pd.testing.assert_frame_equal(leidas[nombre], hoja, obj=nombre)
+
+
+def incidente(fecha_down, fecha_up=None, estado='Caído y recuperado'):
+    fecha_down, fecha_up = pd.Timestamp(fecha_down), pd.Timestamp(fecha_up) if fecha_up else pd.NaT
+    tiempo = round((fecha_up - fecha_down).total_seconds() / 60) if fecha_up is not pd.NaT else None
+    return {'Enlace': 'AG0001 Principal CNT', 'Fecha Down': fecha_down, 'Fecha Up': fecha_up, 'Tiempo': tiempo,
+            'Estado': estado if fecha_up is not pd.NaT else 'Caído', 'Agencia_base': 'AG0001', 'Proveedor': 'CNT'}
+
+
+def test_caida_abierta_cerrada_por_un_export_posterior(tmp_path):
+    conexion = abrir_almacen(str(tmp_path / 'incidentes.sqlite'))
+    # Un export que empieza tarde ve abierta la caída de las 09:00; uno completo la junta con la de las 08:00
+    guardar_incidentes(conexion, pd.DataFrame([incidente('2025-01-01 09:00')]))
+    guardar_incidentes(conexion, pd.DataFrame([incidente('2025-01-01 08:00', '2025-01-01 10:00')]))
+    filas = conexion.execute('SELECT fecha_down, fecha_up FROM incidentes').fetchall()
+    conexion.close()
+    assert filas == [(int(pd.Timestamp('2025-01-01 08:00').timestamp()), int(pd.Timestamp('2025-01-01 10:00').timestamp()))]
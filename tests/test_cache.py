@@ -0,0 +1,17 @@
+import pandas as pd
+
+from eventos_orion import cache
+from eventos_orion.pipeline import Pipeline
+
+
+def test_resultado_del_disco_igual_que_sin_cache(export_realista, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, '_procesados', {})
+    sin_cache = Pipeline().procesar_archivo(export_realista)
+    procesado = Pipeline().procesar(export_realista)
+    # Sin la caché en memoria se lee el Parquet guardado
+    cache._procesados.clear()
+    del_disco = Pipeline().procesar(export_realista)
+    assert isinstance(sin_cache['Enlace'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(procesado, sin_cache)
+    pd.testing.assert_frame_equal(del_disco, sin_cache)
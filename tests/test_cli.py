@@ -0,0 +1,63 @@
+import os
+
+import pandas as pd
+import pytest
+
+from eventos_orion.cli import ERROR_ARGUMENTOS, ERROR_ENTRADA, EXITO, main
+from eventos_orion.sintetico import generar_export_realista
+from eventos_orion.variantes import VARIANTES
+
+
+@pytest.fixture
+def export(tmp_path, monkeypatch):
+    # La caché va a files/.cache del directorio actual
+    monkeypatch.chdir(tmp_path)
+    ruta = tmp_path / 'export.parquet'
+    generar_export_realista(2000, n_agencias=30, dias=3).to_parquet(ruta, index=False)
+    return ruta
+
+
+@pytest.mark.parametrize('variante', list(VARIANTES))
+def test_report_por_defecto(export, tmp_path, variante):
+    salida = tmp_path / 'reportes'
+    codigo = main(['report', '--from', '01/01/2025', '--to', '03/01/2025', '--input', str(export),
+                   '--output-dir', str(salida), '--variante', variante])
+    assert codigo == EXITO
+    assert len(os.listdir(salida)) == len(VARIANTES[variante]['reportes'])
+
+
+def test_report_tipo_no_disponible(export, tmp_path):
+    codigo = main(['report', '--from', '01/01/2025', '--to', '03/01/2025', '--input', str(export),
+                   '--output-dir', str(tmp_path), '--variante', 'app', '--types', 'standby'])
+    assert codigo == ERROR_ARGUMENTOS
+
+
+@pytest.mark.parametrize('formatos', ['xls', 'xlsx,cvs', ''])
+def test_report_formato_desconocido(export, tmp_path, formatos, capsys):
+    with pytest.raises(SystemExit) as salida:
+        main(['report', '--from', '01/01/2025', '--to', '03/01/2025', '--input', str(export),
+              '--output-dir', str(tmp_path / 'reportes'), '--formatos', formatos])
+    assert salida.value.code == ERROR_ARGUMENTOS
+    assert 'formatos inválidos' in capsys.readouterr().err
+    assert not (tmp_path / 'reportes').exists()
+
+
+def test_report_imprime_lo_escrito(export, tmp_path, capsys):
+    salida = tmp_path / 'reportes'
+    codigo = main(['report', '--from', '01/01/2025', '--to', '03/01/2025', '--input', str(export),
+                   '--output-dir', str(salida), '--types', 'dia', '--formatos', 'csv'])
+    assert codigo == EXITO
+    impresas = [linea.split(': ', 1)[1] for linea in capsys.readouterr().out.splitlines() if linea.startswith('✅')]
+    assert impresas == [str(salida / '20250101_20250103_Dia')]
+    assert os.listdir(salida) == ['20250101_20250103_Dia']
+
+
+def test_report_eventtime_ilegible(export, tmp_path):
+    # Con EventTime en texto que no sigue FORMATO_EVENTTIME no se genera un reporte vacío
+    df = pd.read_parquet(export)
+    df['EventTime'] = df['EventTime'].dt.strftime('%m/%d/%Y %I:%M:%S %p')
+    df.to_parquet(export, index=False)
+    codigo = main(['report', '--from', '01/01/2025', '--to', '03/01/2025', '--input', str(export),
+                   '--output-dir', str(tmp_path / 'reportes')])
+    assert codigo == ERROR_ENTRADA
+    assert not (tmp_path / 'reportes').exists()
@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from eventos_orion.pipeline import ajustar_horas, preprocesar_datos
+from eventos_orion.procesamiento import analizar_incidentes, emparejar_eventos
+from eventos_orion.sintetico import generar_export_realista
+
+COLUMNAS = ['Enlace', 'Fecha Down', 'Fecha Up', 'Tiempo', 'Estado', 'Agencia_base', 'Proveedor']
+
+
+# Bucle con iterrows de main.py (caidas_repetidas=False) y app.py (caidas_repetidas=True) antes de
+# vectorizar, como referencia. Único cambio: los eventos del mismo minuto se ordenan de forma
+# estable, en el orden del export, igual que emparejar_eventos.
+def reboots_por_agencia(df):
+    reboots = {}
+    for _, fila in df[df['EventTypeName'].str.lower().str.contains('reboot')].iterrows():
+        reboots.setdefault(fila['Agencia_base'], set()).add(fila['EventTime'].replace(second=0, microsecond=0))
+    return reboots
+
+
+def hay_reboot_cercano(agencia, fecha_up, reboots):
+    if agencia not in reboots or pd.isna(fecha_up):
+        return False
+    fecha_up = fecha_up.replace(second=0, microsecond=0)
+    return any(fecha_up + timedelta(minutes=i) in reboots[agencia] for i in range(-2, 3))
+
+
+def analizar_eventos_original(df, caidas_repetidas=False):
+    resultado = []
+    reboots = reboots_por_agencia(df)
+
+    def incidente(agencia, fecha_down, fecha_up, fila):
+        if fecha_up is None:
+            tiempo, estado = None, 'Caído'
+        else:
+            tiempo = round((fecha_up - fecha_down).total_seconds() / 60)
+            estado = 'Reboot' if hay_reboot_cercano(agencia, fecha_up, reboots) else 'Caído y recuperado'
+        return {'Enlace': agencia, 'Fecha Down': fecha_down, 'Fecha Up': fecha_up, 'Tiempo': tiempo, 'Estado': estado,
+                'Agencia_base': fila['Agencia_base'], 'Proveedor': fila['Proveedor']}
+
+    for agencia, grupo in df.groupby('Agencia_base'):
+        fecha_down = None
+        for _, fila in grupo.sort_values('EventTime', kind='stable').iterrows():
+            evento = str(fila['EventTypeName']).lower()
+            if 'down' in evento:
+                if fecha_down is None:
+                    fecha_down = fila['EventTime']
+                elif caidas_repetidas:
+                    resultado.append(incidente(agencia, fecha_down, None, fila))
+                    fecha_down = fila['EventTime']
+            elif 'up' in evento and fecha_down is not None:
+                resultado.append(incidente(agencia, fecha_down, fila['EventTime'], fila))
+                fecha_down = None
+        if fecha_down is not None:
+            resultado.append(incidente(agencia, fecha_down, None, grupo.iloc[-1]))
+    return pd.DataFrame(resultado, columns=COLUMNAS)
+
+
+def comparables(df):
+    """Columnas como objetos de Python, para comparar sin depender de los dtypes de cada versión."""
+    df = df[COLUMNAS].reset_index(drop=True)
+    salida = pd.DataFrame({columna: df[columna].astype(object) for columna in ['Enlace', 'Estado', 'Agencia_base', 'Proveedor']})
+    for columna in ['Fecha Down', 'Fecha Up']:
+        salida[columna] = pd.to_datetime(df[columna]).astype('datetime64[us]')
+    salida['Tiempo'] = df['Tiempo'].astype('Float64')
+    return salida[COLUMNAS]
+
+
+def eventos(filas):
+    """Eventos ya preprocesados a partir de (agencia, minuto, tipo, proveedor)."""
+    agencias, minutos, tipos, proveedores = zip(*filas)
+    return pd.DataFrame({
+        'EventTime': pd.Timestamp('2025-06-01 08:00') + pd.to_timedelta(list(minutos), unit='min'),
+        'EventTypeName': list(tipos),
+        'Message': [f"{agencia} {tipo}" for agencia, tipo in zip(agencias, tipos)],
+        'Proveedor': list(proveedores),
+        'Agencia_base': list(agencias),
+    })
+
+
+CASOS = {
+    # Dos downs seguidos antes del up: main ignora el segundo, app registra el primero como 'Caído'
+    'downs_repetidos': [('A', 0, 'Node Down', 'Cnt'), ('A', 5, 'Node Down', 'Claro'), ('A', 9, 'Node Up', 'Telconet')],
+    # La caída sin up al final toma el Proveedor de la última fila de la agencia
+    'down_final': [('A', 0, 'Node Down', 'Cnt'), ('A', 3, 'Node Up', 'Cnt'), ('A', 7, 'Node Down', 'Cnt'),
+                   ('A', 8, 'Node Rebooted', 'Claro')],
+    # Ups sin down previo, al inicio y entre caídas, no generan incidentes
+    'ups_huerfanos': [('A', 0, 'Node Up', 'Cnt'), ('A', 1, 'Node Down', 'Cnt'), ('A', 2, 'Node Up', 'Cnt'),
+                      ('A', 3, 'Node Up', 'Cnt'), ('B', 4, 'Node Up', 'Claro')],
+    # Eventos del mismo minuto: se toman en el orden del export
+    'empates_mismo_minuto': [('A', 0, 'Node Up', 'Cnt'), ('A', 0, 'Node Down', 'Cnt'), ('A', 0, 'Node Up', 'Cnt'),
+                             ('A', 0, 'Node Down', 'Cnt'), ('A', 0, 'Node Down', 'Cnt'), ('B', 1, 'Node Down', 'Claro'),
+                             ('B', 1, 'Node Up', 'Claro'), ('B', 1, 'Node Down', 'Claro')],
+    # Reboots a 2 minutos del up (Reboot) y a 3 (no)
+    'reboots': [('A', 0, 'Node Down', 'Cnt'), ('A', 10, 'Node Up', 'Cnt'), ('A', 12, 'Node Rebooted', 'Cnt'),
+                ('B', 0, 'Node Down', 'Claro'), ('B', 10, 'Node Up', 'Claro'), ('B', 13, 'Node Rebooted', 'Claro')],
+}
+
+
+@pytest.mark.parametrize('caidas_repetidas', [False, True], ids=['main', 'app'])
+@pytest.mark.parametrize('caso', list(CASOS))
+def test_casos_como_el_bucle_original(caso, caidas_repetidas):
+    df = eventos(CASOS[caso])
+    esperado = analizar_eventos_original(df, caidas_repetidas)
+    resultado = analizar_incidentes(df, caidas_repetidas=caidas_repetidas)
+    pd.testing.assert_frame_equal(comparables(resultado), comparables(esperado))
+
+
+@pytest.fixture(scope='module')
+def export_sintetico():
+    # Segundos redondeados al minuto: hay muchos eventos de un mismo enlace en el mismo minuto
+    return preprocesar_datos(ajustar_horas(generar_export_realista(6000, n_agencias=60, dias=5)))
+
+
+@pytest.mark.parametrize('caidas_repetidas', [False, True], ids=['main', 'app'])
+def test_export_sintetico_como_el_bucle_original(export_sintetico, caidas_repetidas):
+    df = export_sintetico.copy()
+    esperado = analizar_eventos_original(df, caidas_repetidas)
+    resultado = analizar_incidentes(df, caidas_repetidas=caidas_repetidas)
+    assert (esperado['Estado'] == 'Reboot').any() and (esperado['Estado'] == 'Caído').any()
+    pd.testing.assert_frame_equal(comparables(resultado), comparables(esperado))
+
+
+@pytest.mark.parametrize('caidas_repetidas', [False, True], ids=['main', 'app'])
+def test_emparejar_sin_reboots(export_sintetico, caidas_repetidas):
+    # emparejar_eventos deja todos los pares como 'Caído y recuperado'
+    df = export_sintetico[~export_sintetico['EventTypeName'].str.contains('Reboot')]
+    esperado = comparables(analizar_eventos_original(df, caidas_repetidas))
+    resultado = comparables(emparejar_eventos(df, caidas_repetidas=caidas_repetidas))
+    pd.testing.assert_frame_equal(resultado, esperado)
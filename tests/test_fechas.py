@@ -0,0 +1,45 @@
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import pytest
+
+from eventos_orion.ingesta import leer_fechas
+from eventos_orion.vivo import leer_instante
+
+ZONA = 'America/Guayaquil'
+
+
+def hora_reporte(valores, formato):
+    """EventTime como lo deja ajustar_horas, sin redondear."""
+    return leer_fechas(pd.Series(valores), formato, utc=True).dt.tz_convert(ZONA).dt.tz_localize(None)
+
+
+@pytest.mark.parametrize('formato, valores', [
+    ('ISO8601', ['2025-06-01 13:05:42', '2025-06-01T13:05:42Z', '2025-06-01T08:05:42-05:00', '2025-06-01T15:05:42.250+02:00']),
+    ('%d/%m/%Y %H:%M:%S', ['01/06/2025 13:05:42', '31/12/2025 23:59:59']),
+    ('%Y-%m-%d %H:%M:%S%z', ['2025-06-01 13:05:42+0000', '2025-06-01 10:05:42-0300']),
+])
+def test_vivo_lee_como_el_reporte(formato, valores):
+    esperado = hora_reporte(valores, formato)
+    instantes = [leer_instante(valor, ZoneInfo(ZONA), formato) for valor in valores]
+    assert [pd.Timestamp(instante) for instante in instantes] == list(esperado)
+
+
+def test_vivo_descarta_otro_formato():
+    assert leer_instante('2025-06-01 13:05:42', ZoneInfo(ZONA), '%d/%m/%Y %H:%M:%S') is None
+
+
+def test_reporte_avisa_fechas_perdidas():
+    # Un valor ilegible entre muchos: se avisa y queda sin fecha
+    valores = pd.Series(['01/06/2025 13:05:42'] * 200 + ['2025-06-01 13:05:42', None])
+    with pytest.warns(UserWarning, match="1 de 201 EventTime no tienen el formato"):
+        fechas = leer_fechas(valores, '%d/%m/%Y %H:%M:%S')
+    assert fechas.isna().tolist() == [False] * 200 + [True, True]
+
+
+def test_reporte_rechaza_texto_de_otro_formato():
+    # El texto habitual del export no es ISO8601: sin fechas el reporte saldría vacío
+    valores = pd.Series(['01/01/2025 12:00:49 AM', '01/01/2025 01:15:02 PM', '12/31/2025 11:59:59 PM'])
+    with pytest.raises(ValueError, match="3 de 3 EventTime no tienen el formato 'ISO8601'"):
+        leer_fechas(valores, 'ISO8601', utc=True)
+    assert leer_fechas(valores, '%m/%d/%Y %I:%M:%S %p').notna().all()
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from eventos_orion.flapping import COLUMNA_AGRUPADAS, ESTADO_FLAPPING, agrupar_flapping, rafagas_flapping
+from eventos_orion.pipeline import Pipeline
+
+VENTANA, CAIDAS = pd.Timedelta('30min'), 5
+
+
+def rafagas_fuerza_bruta(df, ventana=VENTANA, caidas=CAIDAS):
+    """Ráfagas como conjuntos de filas: se revisa cada ventana [Fecha Down - ventana, Fecha Down] caída por caída."""
+    rafagas = set()
+    for _, grupo in df.reset_index(drop=True).groupby('Enlace', observed=True):
+        grupo = grupo.sort_values('Fecha Down', kind='stable')
+        filas, tiempos = list(grupo.index), list(grupo['Fecha Down'])
+        marcadas = set()
+        for tiempo in tiempos:
+            dentro = [fila for fila, otro in zip(filas, tiempos) if tiempo - ventana <= otro <= tiempo]
+            if len(dentro) >= caidas:
+                marcadas.update(dentro)
+        actual, anterior = [], None
+        for fila, tiempo in zip(filas, tiempos):
+            if fila in marcadas and actual and tiempo - anterior <= ventana:
+                actual.append(fila)
+            else:
+                if actual:
+                    rafagas.add(frozenset(actual))
+                actual = [fila] if fila in marcadas else []
+            anterior = tiempo
+        if actual:
+            rafagas.add(frozenset(actual))
+    return rafagas
+
+
+def como_conjuntos(rafaga):
+    return {frozenset(pd.Series(range(len(rafaga)))[rafaga == numero]) for numero in set(rafaga) - {-1}}
+
+
+def incidentes_cada(minutos, enlace='AG0001 Principal CNT'):
+    fechas = pd.Timestamp('2025-01-01 08:00') + pd.to_timedelta(minutos, unit='min')
+    return pd.DataFrame({'Enlace': enlace, 'Fecha Down': fechas, 'Fecha Up': fechas + pd.Timedelta(minutes=1), 'Tiempo': 1,
+                         'Estado': 'Caído y recuperado', 'Agencia_base': 'AG0001', 'Proveedor': 'CNT'})
+
+
+@pytest.mark.parametrize('minutos', [
+    [0, 5, 10, 15, 20],  # justo 5 en 20 minutos
+    [0, 10, 20, 30, 40],  # 5 caídas pero nunca 5 dentro de 30 minutos
+    [0, 0, 0, 0, 30, 31],  # 5 con los bordes de la ventana incluidos, y la siguiente a 1 minuto
+    [0, 7, 14, 21, 28, 60, 67, 74, 81, 88],  # dos ráfagas separadas por más de la ventana
+    [0, 7, 14, 21, 28, 40, 52, 64],  # ráfaga y después caídas que ya no llenan ninguna ventana
+])
+def test_casos_como_fuerza_bruta(minutos):
+    df = incidentes_cada(minutos)
+    assert como_conjuntos(rafagas_flapping(df, '30min', 5)) == rafagas_fuerza_bruta(df)
+
+
+def test_export_como_fuerza_bruta(export_realista):
+    incidentes = Pipeline().procesar_archivo(export_realista)
+    esperadas = rafagas_fuerza_bruta(incidentes)
+    assert len(esperadas) > 5
+    assert como_conjuntos(rafagas_flapping(incidentes, '30min', 5)) == esperadas
+
+    agrupados = agrupar_flapping(incidentes, '30min', 5)
+    assert COLUMNA_AGRUPADAS == 'Caídas agrupadas' and COLUMNA_AGRUPADAS in agrupados.columns
+    flapping = agrupados[agrupados['Estado'] == ESTADO_FLAPPING]
+    assert sorted(flapping[COLUMNA_AGRUPADAS]) == sorted(map(len, esperadas))
+    assert agrupados[COLUMNA_AGRUPADAS].sum() == len(incidentes)
+    assert (agrupados.loc[agrupados['Estado'] != ESTADO_FLAPPING, COLUMNA_AGRUPADAS] == 1).all()
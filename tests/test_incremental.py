@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eventos_orion import incremental
+from eventos_orion.incremental import cargar_estado, leer_almacen, procesar_lote, reiniciar_estado
+from eventos_orion.pipeline import Pipeline
+from eventos_orion.procesamiento import analizar_incidentes, corregir_estados_reboot
+from eventos_orion.variantes import MARGEN_REBOOT, VARIANTES, VENTANA_REBOOT
+
+
+@pytest.fixture(scope='module')
+def eventos(export_realista):
+    pipeline = Pipeline()
+    return pipeline.clasificar(pipeline.cargar(export_realista)).reset_index(drop=True)
+
+
+def lotes(df, n, solape=0):
+    """n exports consecutivos; con solape cada uno repite las últimas filas del anterior."""
+    cortes = np.linspace(0, len(df), n + 1).astype(int)
+    return [df.iloc[max(inicio - solape, 0):fin] for inicio, fin in zip(cortes[:-1], cortes[1:])]
+
+
+def valores(df):
+    """Las categorías del procesamiento completo incluyen las de todo el export; se comparan los valores."""
+    return df.astype({columna: object for columna in df.columns if isinstance(df[columna].dtype, pd.CategoricalDtype)})
+
+
+def procesar_en_lotes(partes, directorio, caidas_repetidas):
+    emitidos = [procesar_lote(parte, caidas_repetidas, VENTANA_REBOOT, MARGEN_REBOOT, directorio) for parte in partes]
+    return emitidos, leer_almacen(directorio)
+
+
+@pytest.mark.parametrize('variante', list(VARIANTES))
+@pytest.mark.parametrize('n, solape', [(3, 0), (17, 0), (5, 200)], ids=['3_lotes', '17_lotes', 'solapados'])
+def test_lotes_igual_que_todo_de_una_vez(eventos, tmp_path, variante, n, solape):
+    pipeline = Pipeline(variante)
+    completo = pipeline.corregir(pipeline.emparejar(eventos.copy()))
+    emitidos, almacen = procesar_en_lotes(lotes(eventos, n, solape), tmp_path, pipeline.caidas_repetidas)
+    pd.testing.assert_frame_equal(valores(almacen), valores(completo))
+
+    # Cada incidente se emite una sola vez y lo que falta sigue en los recientes sin emitir
+    estado = cargar_estado(tmp_path)
+    pendientes = estado['recientes'][~estado['recientes']['Emitido']]
+    assert sum(map(len, emitidos)) + len(pendientes) == len(completo)
+    assert pd.Timestamp(estado['marca']) == eventos['EventTime'].max()
+    assert estado['siguiente_orden'] == len(eventos) + solape * (n - 1)
+
+
+def test_mismo_export_dos_veces(eventos, tmp_path):
+    # Los eventos anteriores a la marca o repetidos en ella ya están procesados
+    procesar_en_lotes([eventos], tmp_path, False)
+    emitidos, almacen = procesar_en_lotes([eventos], tmp_path, False)
+    assert not len(emitidos[0])
+    pipeline = Pipeline()
+    pd.testing.assert_frame_equal(valores(almacen), valores(pipeline.corregir(pipeline.emparejar(eventos.copy()))))
+
+
+def test_otros_parametros_exigen_reiniciar(eventos, tmp_path):
+    primero, segundo = lotes(eventos, 2)
+    procesar_lote(primero, False, VENTANA_REBOOT, MARGEN_REBOOT, tmp_path)
+    with pytest.raises(ValueError, match="reinícielo"):
+        procesar_lote(segundo, True, VENTANA_REBOOT, MARGEN_REBOOT, tmp_path)
+    with pytest.raises(ValueError, match="reinícielo"):
+        procesar_lote(segundo, False, '5min', MARGEN_REBOOT, tmp_path)
+
+    reiniciar_estado(tmp_path)
+    assert cargar_estado(tmp_path) is None
+    procesar_en_lotes([primero, segundo], tmp_path, True)
+    pipeline = Pipeline('app')
+    completo = pipeline.corregir(pipeline.emparejar(eventos.copy()))
+    pd.testing.assert_frame_equal(valores(leer_almacen(tmp_path)), valores(completo))
+
+
+def eventos_minuto(tipos):
+    """Eventos del enlace 'AG0001 Principal CNT', todos en el mismo minuto."""
+    return pd.DataFrame({
+        'EventTime': pd.Timestamp('2025-01-01 08:00'),
+        'EventTypeName': tipos,
+        'Message': [f"AG0001 Principal CNT {tipo}" for tipo in tipos],
+        'Proveedor': 'CNT',
+        'Agencia_base': 'AG0001 Principal CNT',
+    })
+
+
+@pytest.mark.parametrize('segundo', [
+    ['Node Up'],  # export siguiente, sin solape: el up repetido es un evento nuevo
+    ['Node Down', 'Node Up'],  # repite el final del minuto y sigue
+    ['Node Up', 'Node Down', 'Node Up'],  # repite el minuto entero y sigue
+], ids=['sin_solape', 'solape_parcial', 'solape_completo'])
+def test_eventos_iguales_en_el_minuto_de_la_marca(tmp_path, segundo):
+    primero = eventos_minuto(['Node Down', 'Node Up', 'Node Down'])
+    procesar_en_lotes([primero, eventos_minuto(segundo)], tmp_path, False)
+    completo = analizar_incidentes(eventos_minuto(['Node Down', 'Node Up', 'Node Down', 'Node Up']))
+    assert len(completo) == 2
+    pd.testing.assert_frame_equal(valores(leer_almacen(tmp_path)), valores(corregir_estados_reboot(completo)))
+
+
+def test_lote_cortado_antes_de_guardar_el_estado(eventos, tmp_path, monkeypatch):
+    partes = lotes(eventos, 3)
+    procesar_lote(partes[0], False, VENTANA_REBOOT, MARGEN_REBOOT, tmp_path)
+
+    # El proceso muere justo antes de reemplazar estado.json: los archivos del lote quedan escritos
+    def cortar(*args):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(incremental.os, 'replace', cortar)
+    with pytest.raises(KeyboardInterrupt):
+        procesar_lote(partes[1], False, VENTANA_REBOOT, MARGEN_REBOOT, tmp_path)
+    monkeypatch.undo()
+    assert cargar_estado(tmp_path)['lote'] == 1
+
+    # Al repetir el lote no quedan incidentes duplicados
+    procesar_en_lotes(partes[1:], tmp_path, False)
+    pipeline = Pipeline()
+    pd.testing.assert_frame_equal(valores(leer_almacen(tmp_path)), valores(pipeline.corregir(pipeline.emparejar(eventos.copy()))))
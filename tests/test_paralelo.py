@@ -0,0 +1,13 @@
+import pandas as pd
+import pytest
+
+from eventos_orion.pipeline import Pipeline
+from eventos_orion.variantes import VARIANTES
+
+
+@pytest.mark.parametrize('variante', list(VARIANTES))
+def test_paralelo_igual_que_en_serie(export_realista, variante):
+    serie = Pipeline(variante).procesar_archivo(export_realista)
+    paralelo = Pipeline(variante, workers=3).procesar_archivo(export_realista)
+    assert (serie['Estado'] == 'Reboot').any()
+    pd.testing.assert_frame_equal(paralelo, serie)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eventos_orion.cli import EXITO, main
+from eventos_orion.pipeline import Pipeline
+from eventos_orion.resumen import DIMENSIONES, resumen_periodo
+
+# Días enteros dentro del export: los incidentes de los bordes caen en parte fuera del rango
+FECHA_INICIO, FECHA_FIN = pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-02')
+
+
+def resumen_groupby(incidentes, dimension, enlaces, fecha_inicio=FECHA_INICIO, fecha_fin=FECHA_FIN):
+    """El resumen calculado directamente con groupby y quantile sobre los incidentes."""
+    desde, hasta = fecha_inicio, fecha_fin + pd.Timedelta(days=1)
+    df = incidentes.astype({dimension: object, 'Estado': object, 'Enlace': object})
+    en_rango = df[(df['Fecha Down'] >= desde) & (df['Fecha Down'] < hasta)]
+    tiempo = en_rango['Tiempo'].astype('float64')
+    grupos = en_rango.assign(Minutos=tiempo.fillna(0), Recuperado=tiempo).groupby(dimension)
+    resultado = pd.DataFrame({
+        'Incidentes': grupos.size(),
+        'Reboots': grupos['Estado'].apply(lambda estado: (estado == 'Reboot').sum()),
+        'Caídas': grupos['Estado'].apply(lambda estado: (estado == 'Caído y recuperado').sum()),
+        'Sin recuperar': grupos['Estado'].apply(lambda estado: (estado == 'Caído').sum()),
+        'Minutos': grupos['Minutos'].sum(),
+        'Minutos reboot': grupos.apply(lambda grupo: grupo.loc[grupo['Estado'] == 'Reboot', 'Minutos'].sum()),
+        'Minutos caída': grupos.apply(lambda grupo: grupo.loc[grupo['Estado'] == 'Caído y recuperado', 'Minutos'].sum()),
+        'P50 minutos': grupos['Recuperado'].quantile(0.5),
+        'P95 minutos': grupos['Recuperado'].quantile(0.95),
+    })
+    resultado['Enlaces'] = enlaces.astype({dimension: object}).groupby(dimension)['Enlace'].nunique().reindex(resultado.index)
+
+    # Minutos caídos dentro del rango, de cualquier incidente recuperado que se cruce con él
+    recuperados = df[df['Fecha Up'].notna()]
+    inicio = recuperados['Fecha Down'].clip(lower=desde)
+    fin = recuperados['Fecha Up'].clip(upper=hasta)
+    caidos = ((fin - inicio) / pd.Timedelta(minutes=1)).clip(lower=0).groupby(recuperados[dimension]).sum()
+    minutos_periodo = (hasta - desde) / pd.Timedelta(minutes=1) * resultado['Enlaces']
+    resultado['Disponibilidad %'] = (100 * (1 - caidos.reindex(resultado.index, fill_value=0) / minutos_periodo)).round(3)
+    resultado = resultado.reset_index().rename(columns={'index': dimension})
+    enteros = ['Incidentes', 'Reboots', 'Caídas', 'Sin recuperar', 'Minutos', 'Minutos reboot', 'Minutos caída', 'Enlaces']
+    return resultado.astype({columna: 'int64' for columna in enteros})
+
+
+def comparar(resumen, esperado):
+    grupo = resumen.columns[0]
+    pd.testing.assert_frame_equal(resumen.astype({grupo: object}), esperado.astype({grupo: object}), check_exact=False, atol=1e-9)
+
+
+@pytest.mark.parametrize('dimension', list(DIMENSIONES))
+def test_resumen_del_almacen_como_groupby(export_realista, tmp_path, monkeypatch, dimension):
+    monkeypatch.chdir(tmp_path)
+    pipeline = Pipeline()
+    pipeline.guardar_en_almacen(export_realista, str(tmp_path / 'incidentes.sqlite'))
+    incidentes = pipeline.procesar(export_realista)
+    agregados = pipeline.consultar_resumen(FECHA_INICIO, FECHA_FIN, str(tmp_path / 'incidentes.sqlite'))
+    resumen = resumen_periodo(agregados, dimension, FECHA_INICIO, FECHA_FIN)
+    assert np.isfinite(resumen['P95 minutos']).all()
+    comparar(resumen, resumen_groupby(incidentes, dimension, incidentes))
+
+
+def test_summary_de_los_lotes_incrementales(export_realista, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    pipeline = Pipeline()
+    eventos = pd.read_parquet(export_realista)
+    # Dos lotes; el resumen solo suma los incidentes ya cerrados
+    cerrados = []
+    for parte in np.array_split(np.arange(len(eventos)), 2):
+        ruta = tmp_path / f'lote_{parte[0]}.parquet'
+        eventos.iloc[parte].to_parquet(ruta, index=False)
+        cerrados.append(pipeline.procesar_incremental(str(ruta)))
+    cerrados = pd.concat(cerrados, ignore_index=True)
+
+    codigo = main(['summary', '--from', '01/01/2025', '--to', '02/01/2025', '--output-dir', str(tmp_path / 'resumen'),
+                   '--formatos', 'csv'])
+    assert codigo == EXITO
+    for dimension, hoja in DIMENSIONES.items():
+        escrito = pd.read_csv(tmp_path / 'resumen' / '20250101_20250102_Resumen' / f'{hoja}.csv')
+        # Los enlaces del resumen incremental son los de los incidentes guardados
+        comparar(escrito, resumen_groupby(cerrados, dimension, cerrados))
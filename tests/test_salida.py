@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from eventos_orion.pipeline import Pipeline, generar_hojas
+from eventos_orion.salida import EscritorReporte
+from eventos_orion.sintetico import generar_export_realista
+from eventos_orion.variantes import VARIANTES
+
+FECHA_INICIO, FECHA_FIN = pd.Timestamp('2025-01-03'), pd.Timestamp('2025-01-05')
+
+
+class Hojas:
+    """Hace de EscritorReporte y guarda los DataFrames de cada hoja."""
+
+    def __init__(self):
+        self.hojas = {}
+
+    def hoja(self, nombre, df):
+        self.hojas[nombre] = df
+
+
+@pytest.fixture(scope='module')
+def incidentes(tmp_path_factory):
+    # Viernes a domingo: el standby también tiene las hojas de sábado y domingo matutino
+    ruta = tmp_path_factory.mktemp('salida') / 'orion.parquet'
+    generar_export_realista(3000, n_agencias=30, inicio='2025-01-03 05:00', dias=3).to_parquet(ruta, index=False)
+    return Pipeline().procesar_archivo(ruta)
+
+
+def como_excel(df):
+    """Los valores como los devuelve read_excel: texto como str, números como float y vacíos como NaN."""
+    salida = df.reset_index(drop=True).astype({'Enlace': str, 'Estado': str, 'Agencia_base': str, 'Proveedor': str})
+    salida['Tiempo'] = salida['Tiempo'].astype('float64')
+    for columna in ['Fecha Down', 'Fecha Up']:
+        salida[columna] = salida[columna].astype('datetime64[us]')
+    return salida
+
+
+@pytest.mark.parametrize('tipo', list(VARIANTES['main']['reportes']))
+def test_excel_constant_memory(incidentes, tmp_path, tipo):
+    reporte = VARIANTES['main']['reportes'][tipo]
+    esperadas = Hojas()
+    generar_hojas(incidentes, esperadas, reporte, FECHA_INICIO, FECHA_FIN)
+    ruta = tmp_path / f'{tipo}.xlsx'
+    with EscritorReporte(str(ruta)) as escritor:
+        generar_hojas(incidentes, escritor, reporte, FECHA_INICIO, FECHA_FIN)
+
+    leidas = pd.read_excel(ruta, sheet_name=None)
+    assert list(leidas) == list(esperadas.hojas)
+    if tipo == 'standby':
+        assert {'04_Sabado_Matutino', '05_Domingo_Matutino'} <= set(leidas)
+    for nombre, df in esperadas.hojas.items():
+        assert len(df)
+        # read_excel deja Tiempo como int64 si la hoja no tiene vacíos
+        leida = leidas[nombre].astype({'Fecha Down': 'datetime64[us]', 'Fecha Up': 'datetime64[us]', 'Tiempo': 'float64'})
+        pd.testing.assert_frame_equal(leida, como_excel(df))
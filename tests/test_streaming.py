@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+
+from eventos_orion.pipeline import Pipeline
+from eventos_orion.streaming import leer_resultado
+from eventos_orion.variantes import VARIANTES
+
+
+def valores(df):
+    return df.astype({columna: object for columna in df.columns if isinstance(df[columna].dtype, pd.CategoricalDtype)})
+
+
+@pytest.mark.parametrize('variante', list(VARIANTES))
+def test_por_bloques_igual_que_en_memoria(export_realista, tmp_path, monkeypatch, variante):
+    monkeypatch.chdir(tmp_path)
+    pipeline = Pipeline(variante)
+    # 997 filas: los bloques cortan caídas abiertas y minutos con varios eventos de una agencia
+    escritos = pipeline.procesar_por_bloques(str(export_realista), str(tmp_path / 'incidentes.parquet'), 997)
+    en_memoria = pipeline.procesar(export_realista)
+    assert escritos == len(en_memoria)
+    pd.testing.assert_frame_equal(valores(leer_resultado(tmp_path / 'incidentes.parquet')), valores(en_memoria))